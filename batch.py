@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from catalog import load_course_entries
+from export import iter_ranked_schedules, schedule_record
+from main import CourseSection, incompatible_message, meets_constraints, parse_modes, parse_time
+from solver import SearchSpace, score_groups
+
+DEFAULT_TOP = 10
+# With a result limit, the filtered section lists and conflict tables shared
+# between requests are dropped once either holds this many entries per result
+SHARED_ENTRIES_PER_RESULT = 64
+
+
+def request_key(request, default_top=DEFAULT_TOP):
+    """Normalizes one request into a hashable (courses, earliest, latest, modes, top) tuple.
+
+    Courses are deduplicated and sorted, so requests that only differ in the
+    order they list courses share a key. Raises ValueError for bad requests,
+    including fields of the wrong type.
+    """
+    courses = request.get("courses") if isinstance(request, dict) else None
+    if not isinstance(courses, list) or not courses:
+        raise ValueError("request needs a non-empty 'courses' list")
+    if not all(isinstance(course, str) for course in courses):
+        raise ValueError("'courses' must list course IDs as strings")
+    for field in ("earliest", "latest", "mode"):
+        if request.get(field) and not isinstance(request[field], str):
+            raise ValueError(f"'{field}' must be a string")
+    courses = tuple(sorted(set(courses)))
+    earliest = parse_time(request["earliest"]) if request.get("earliest") else None
+    latest = parse_time(request["latest"]) if request.get("latest") else None
+    modes, unknown = parse_modes(request["mode"]) if request.get("mode") else ([], [])
+    if unknown:
+        raise ValueError(f"unknown mode '{unknown[0]}'. Options: f2f, hybrid, sync, async")
+    top = request.get("top", default_top)
+    if not isinstance(top, int) or top < 1:
+        raise ValueError("'top' must be a positive integer")
+    return courses, earliest, latest, tuple(sorted(modes)), top
+
+
+class BatchSolver:
+    """Solves many schedule requests against one loaded catalog.
+
+    Parsed sections, constraint-filtered section lists and course-vs-course
+    conflict tables are cached and shared by every request this solver sees,
+    and results are cached by normalized request key, keeping only the
+    `max_results` most recently used when that is set. A limit also bounds
+    the shared caches, which start over when they outgrow it.
+    """
+
+    def __init__(self, entries, max_results=None):
+        self.max_results = max_results
+        self.entries_by_course = {}
+        for entry in entries:
+            self.entries_by_course.setdefault(entry["course"], []).append(entry)
+        self._sections = {}
+        self._buckets = {}
+        self._tables = {}
+        self._results = OrderedDict()
+
+    def sections(self, course):
+        if course not in self._sections:
+            self._sections[course] = [CourseSection(entry, 0) for entry in self.entries_by_course.get(course, [])]
+        return self._sections[course]
+
+    def bucket(self, course, earliest, latest, modes):
+        key = (course, earliest, latest, modes)
+        if key not in self._buckets:
+            self._buckets[key] = [s for s in self.sections(course) if meets_constraints(s, earliest, latest, modes)]
+        return self._buckets[key]
+
+    def solve(self, key):
+        """The result record body for a key from `request_key`."""
+        if key in self._results:
+            self._results.move_to_end(key)
+            return self._results[key]
+        result = self._results[key] = self._solve(*key)
+        if self.max_results is not None:
+            if len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+            shared_limit = self.max_results * SHARED_ENTRIES_PER_RESULT
+            if len(self._buckets) > shared_limit or len(self._tables) > shared_limit:
+                self._buckets.clear()
+                self._tables.clear()
+        return result
+
+    def _solve(self, courses, earliest, latest, modes, top):
+        buckets = {course: self.bucket(course, earliest, latest, modes) for course in courses}
+        for course in courses:
+            if not buckets[course]:
+                return {"status": "error", "error": f"No valid sections found for '{course}' matching constraints."}
+
+        space = SearchSpace(buckets, courses, table_cache=self._tables)
+        if space.incompatible:
+            return {"status": "error", "error": incompatible_message(*space.incompatible)}
+        ranked = score_groups(space.iter_best_groups(top))
+        schedules = [schedule_record(*ranked_schedule) for ranked_schedule in iter_ranked_schedules(ranked, top)]
+        if not schedules:
+            return {"status": "error", "error": "No valid schedules found that meet all constraints."}
+        return {"status": "ok", "schedules": schedules}
+
+
+# --- Parallel Solving ---
+
+# Each worker process builds its own solver (and caches) once, in `_init_worker`
+_worker_solver = None
+
+
+def _init_worker(entries):
+    global _worker_solver
+    _worker_solver = BatchSolver(entries)
+
+
+def _solve_in_worker(key):
+    return _worker_solver.solve(key)
+
+
+def iter_batch_results(requests, entries, workers=1, default_top=DEFAULT_TOP):
+    """Yields one result record per request, in request order.
+
+    Identical requests (after normalization) are solved once; distinct ones
+    are spread over `workers` processes, each keeping its own caches.
+    """
+    keys = []
+    for request in requests:
+        try:
+            keys.append(request_key(request, default_top))
+        except ValueError as e:
+            keys.append(e)
+    unique_keys = list(dict.fromkeys(key for key in keys if not isinstance(key, ValueError)))
+
+    if workers > 1 and len(unique_keys) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(entries,))
+        chunksize = max(1, len(unique_keys) // (workers * 4))
+        results = pool.map(_solve_in_worker, unique_keys, chunksize=chunksize)
+    else:
+        pool = None
+        results = map(BatchSolver(entries).solve, unique_keys)
+
+    try:
+        # Results arrive in first-occurrence order, so each request's answer is
+        # known by the time it is reached
+        solved = {}
+        pending = iter(zip(unique_keys, results))
+        for index, (request, key) in enumerate(zip(requests, keys)):
+            record = {"id": request.get("id", index) if isinstance(request, dict) else index}
+            if isinstance(key, ValueError):
+                record.update(status="error", error=str(key))
+            else:
+                while key not in solved:
+                    done_key, result = next(pending)
+                    solved[done_key] = result
+                record.update(solved[key])
+            yield record
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def read_requests(path):
+    """Reads one JSON request object per line, skipping blank lines."""
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve many schedule requests against one course catalog")
+    parser.add_argument(
+        "requests",
+        help='NDJSON file, one request per line: {"id", "courses", "earliest", "latest", "mode", "top"}',
+    )
+    parser.add_argument(
+        "--file", default="courses.json", help="Path to JSON file (or its indexed .catalog or shard directory)"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of solver processes")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="Schedules per request unless it sets 'top'")
+    parser.add_argument("--output", help="Write result records here instead of stdout")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.top < 1:
+        parser.error("--top must be at least 1")
+
+    requests = read_requests(args.requests)
+    # Load every course any request mentions, once
+    wanted = {
+        course
+        for request in requests
+        if isinstance(request, dict) and isinstance(request.get("courses"), list)
+        for course in request["courses"]
+        if isinstance(course, str)
+    }
+    try:
+        entries = load_course_entries(args.file, wanted)
+    except FileNotFoundError:
+        print(f"Error: Could not find {args.file}", file=sys.stderr)
+        sys.exit(1)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for record in iter_batch_results(requests, entries, args.workers, args.top):
+            out.write(json.dumps(record, separators=(",", ":")) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+from dataclasses import asdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from catalog import write_catalog
+from course import CourseTiming, TimetableCourse
+from export import WRITERS
+from main import MODALITY_MAP, ScheduleSession, build_parser, load_sections, parse_modes, parse_time, write_schedules
+from profiling import Profiler, timed
+from solver import combination_count
+
+# Synthetic sections start on a half-hour grid between these times
+FIRST_START = 8 * 60
+LAST_START = 18 * 60
+DURATIONS = (50, 75, 110)
+LOCATIONS = ("MCB 100", "TORG 1020", "GOODW 190", "DURH 261", "NCB 160")
+
+
+def report(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def format_clock(minutes):
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours % 12 or 12:02d}:{minutes:02d}{'AM' if hours < 12 else 'PM'}"
+
+
+# --- Synthetic Catalogs ---
+
+
+def generate_catalog(courses, sections, density, online=0.1, slots=None, seed=0):
+    """Section records shaped like the scraper's, for `courses` courses of `sections` sections each.
+
+    Each weekday is met with probability `density` (at least one day per
+    section), and a course's sections share `slots` distinct meeting patterns
+    (default: half as many as sections), which controls how many equivalent
+    sections the solver can merge. A fraction `online` are arranged online.
+    """
+    rng = random.Random(seed)
+    slots = slots or max(1, sections // 2)
+    records = []
+    crn = 10000
+    for c in range(courses):
+        course_id = f"SYN-{1000 + c}"
+        patterns = []
+        for _ in range(slots):
+            days = "".join(day for day in "MTWRF" if rng.random() < density) or rng.choice("MTWRF")
+            start = rng.randrange(FIRST_START, LAST_START + 1, 30)
+            patterns.append((days, start, rng.choice(DURATIONS)))
+        for _ in range(sections):
+            crn += 1
+            if rng.random() < online:
+                modality = MODALITY_MAP["async"]
+                timing = CourseTiming.from_day_string("(ARR)", "(ARR)", "(ARR)", "ONLINE")
+            else:
+                modality = MODALITY_MAP[rng.choice(("f2f", "f2f", "hybrid", "sync"))]
+                days, start, duration = rng.choice(patterns)
+                timing = CourseTiming.from_day_string(
+                    days, format_clock(start), format_clock(start + duration), rng.choice(LOCATIONS)
+                )
+            section = TimetableCourse(
+                crn=str(crn),
+                course=course_id,
+                title=f"Synthetic Course {c}",
+                schedule_type="L",
+                modality=modality,
+                credit_hours=rng.choice(("3", "3", "4", "1")),
+                capacity="40",
+                instructor="Staff",
+                timing=timing,
+                exam="",
+            )
+            records.append(asdict(section))
+    return records
+
+
+def write_course_data(path, records):
+    """Writes records as a course data JSON file plus its catalog, like the scraper does."""
+    with open(path, "w") as f:
+        json.dump(records, f)
+    write_catalog(os.path.splitext(path)[0] + ".catalog", records)
+
+
+# --- Measurement ---
+
+
+def phase_summary(profilers):
+    """{phase: {"wall", "wall_median", "cpu"}} over one `Profiler` per run.
+
+    The fastest run is the least noisy, so it is the headline.
+    """
+    runs = {}
+    for profiler in profilers:
+        for name, (wall, cpu, _) in profiler.phases.items():
+            runs.setdefault(name, []).append((wall, cpu))
+    return {
+        name: {
+            "wall": min(wall for wall, _ in timings),
+            "wall_median": statistics.median(wall for wall, _ in timings),
+            "cpu": min(cpu for _, cpu in timings),
+        }
+        for name, timings in runs.items()
+    }
+
+
+def result_record(benchmark, params, profilers, counts):
+    return {
+        "benchmark": benchmark,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": params,
+        "phases": phase_summary(profilers),
+        "counts": counts,
+    }
+
+
+# --- Solver Benchmark ---
+
+
+def run_solver(args, profiler):
+    """Runs `main.py` headless once with `args` from its parser, writing schedules nowhere. Returns counts."""
+    courses = list(dict.fromkeys(args.courses))
+    sections_by_course = load_sections(args.file, courses, profiler)
+    earliest = parse_time(args.earliest) if args.earliest else None
+    latest = parse_time(args.latest) if args.latest else None
+    modes = parse_modes(args.mode)[0] if args.mode else []
+    session = ScheduleSession(args, sections_by_course, earliest, latest, modes, profiler=profiler)
+    with timed(profiler, "filter"):
+        empty_courses = session.empty_courses()
+        buckets = session.buckets()
+    written = 0
+    if not empty_courses and session.space().incompatible is None:
+        with open(os.devnull, "w") as out:
+            written = write_schedules(session, WRITERS["ndjson"](out))
+    return {
+        "sections": sum(len(sections) for sections in sections_by_course.values()),
+        "filtered_sections": sum(len(bucket) for bucket in buckets.values()),
+        "combinations": combination_count(buckets, courses),
+        "schedules": written,
+        **profiler.counters,
+    }
+
+
+def solver_benchmark(args):
+    params = {"repeat": args.repeat, "top": args.top, "optimize": args.optimize}
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.file:
+            path, courses = args.file, args.courses
+            params.update(file=path, courses=courses)
+        else:
+            records = generate_catalog(args.courses_count, args.sections, args.density, args.online, seed=args.seed)
+            path = os.path.join(tmp, "synthetic_course_data.json")
+            write_course_data(path, records)
+            courses = list(dict.fromkeys(record["course"] for record in records))
+            params.update(
+                synthetic=True,
+                courses_count=args.courses_count,
+                sections=args.sections,
+                density=args.density,
+                online=args.online,
+                seed=args.seed,
+            )
+        params.update(earliest=args.earliest, latest=args.latest, mode=args.mode)
+
+        # The run is described with main.py's own arguments, so every default matches a real run
+        argv = [*courses, "--file", path, "--format", "ndjson"]
+        for flag, value in (("--earliest", args.earliest), ("--latest", args.latest), ("--mode", args.mode)):
+            if value:
+                argv += [flag, value]
+        if args.top is not None:
+            argv += ["--top", str(args.top)]
+        if args.optimize:
+            argv.append("--optimize")
+        solver_args = build_parser().parse_args(argv)
+
+        profilers = []
+        for _ in range(args.repeat):
+            profilers.append(Profiler())
+            counts = run_solver(solver_args, profilers[-1])
+    return result_record("solver", params, profilers, counts)
+
+
+# --- Scraper Benchmark ---
+
+
+def serve_recording(cache, term):
+    """Serves the pages recorded in a `ScrapeCache` the way the registrar does. Returns (server, base URL)."""
+    subjects = cache.subjects() or []
+    options = " ".join(f'new Option("{code} - {name}", "{code}")' for code, name in subjects)
+    subject_page = f'case "{term}" {options} break;'.encode("utf-8")
+
+    class RecordingHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def reply(self, status, body):
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.reply(200, subject_page)
+
+        def do_POST(self):
+            form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8"))
+            page = cache.html(form.get("subj_code", [""])[0])
+            if page is None:
+                self.reply(404, b"")
+            else:
+                self.reply(200, page.encode("utf-8"))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def scraper_benchmark(args):
+    # Imported here so the solver benchmark does not need the scraper's dependencies
+    from get_raw_course_data import DEFAULT_HEADERS, TERM, _fetch_pages, parse_schedule_html
+    from http_session import PooledSession
+    from scrape_cache import ScrapeCache
+    from subjects import get_subjects_from_web
+
+    cache = ScrapeCache(args.cache_dir or f"scrape_cache_{TERM}")
+    if cache.subjects() is None:
+        raise SystemExit(f"Error: no recorded pages in {cache.directory}; run get_raw_course_data.py once first")
+    server, base_url = serve_recording(cache, TERM)
+    profilers = []
+    try:
+        # The scraper reports progress on stdout, which is reserved for results here
+        with contextlib.redirect_stdout(sys.stderr):
+            for _ in range(args.repeat):
+                profiler = Profiler()
+                profilers.append(profiler)
+                with PooledSession(base_url, args.workers, headers=DEFAULT_HEADERS) as session:
+                    with profiler.phase("subjects"):
+                        subjects = [code for code, _ in get_subjects_from_web(TERM, session)]
+                    with profiler.phase("fetch"):
+                        pages = list(_fetch_pages(session, subjects, args.workers))
+                with profiler.phase("parse"):
+                    sections = sum(len(parse_schedule_html(page, subject)) for subject, page in pages)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    params = {"repeat": args.repeat, "cache_dir": cache.directory, "workers": args.workers}
+    counts = {"subjects": len(subjects), "bytes": sum(len(page) for _, page in pages), "sections": sections}
+    return result_record("scraper", params, profilers, counts)
+
+
+# --- Main ---
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the solver and scraper offline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Write a synthetic course data file (and its catalog)")
+    solver = commands.add_parser("solver", help="Time main.py's load, filter, search and ranking phases")
+    for sub in (generate, solver):
+        sub.add_argument("--courses-count", type=int, default=6, help="Synthetic courses to generate")
+        sub.add_argument("--sections", type=int, default=8, help="Sections per synthetic course")
+        sub.add_argument("--density", type=float, default=0.4, help="Chance a section meets on each weekday")
+        sub.add_argument("--online", type=float, default=0.1, help="Fraction of sections that are arranged online")
+        sub.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic catalog")
+    generate.add_argument("--output", default="synthetic_course_data.json", help="Where to write the JSON file")
+
+    solver.add_argument("--file", help="Benchmark this course data file instead of a synthetic one")
+    solver.add_argument("courses", nargs="*", help="Course IDs to schedule (with --file)")
+    solver.add_argument("--earliest", help="Earliest start time (e.g. 08:00AM)")
+    solver.add_argument("--latest", help="Latest end time (e.g. 05:00PM)")
+    solver.add_argument("--mode", help="Modalities: f2f, hybrid, sync, async (comma separated)")
+    solver.add_argument("--top", type=int, help="Only keep the N best schedules")
+    solver.add_argument("--optimize", action="store_true", help="Search best-first with branch-and-bound")
+
+    scraper = commands.add_parser("scraper", help="Replay recorded registrar pages through the scraper")
+    scraper.add_argument("--cache-dir", help="Scrape cache holding the recorded pages (default: this term's)")
+    scraper.add_argument("--workers", type=int, default=8, help="Most requests in flight at once")
+
+    for sub in (solver, scraper):
+        sub.add_argument("--repeat", type=int, default=5, help="Runs to time; the fastest is reported")
+        sub.add_argument("--output", help="Append the result line to this NDJSON file instead of stdout")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        records = generate_catalog(args.courses_count, args.sections, args.density, args.online, seed=args.seed)
+        write_course_data(args.output, records)
+        report(f"Wrote {len(records)} sections of {args.courses_count} courses to {args.output}")
+        return
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if args.command == "solver" and args.file and not args.courses:
+        parser.error("--file needs the course IDs to schedule")
+    if args.command == "scraper" and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    record = solver_benchmark(args) if args.command == "solver" else scraper_benchmark(args)
+    line = json.dumps(record, separators=(",", ":")) + "\n"
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line)
+    else:
+        sys.stdout.write(line)
+
+
+if __name__ == "__main__":
+    main()
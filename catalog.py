@@ -0,0 +1,224 @@
+import json
+import mmap
+import os
+import shutil
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Catalog layout:
+#   header  - magic + length of the index in bytes
+#   index   - compact JSON {course_id: [offset, length]}, offsets relative to the data block
+#   data    - one compact JSON array of section records per course
+CATALOG_MAGIC = b"SCHDCAT1"
+HEADER = struct.Struct("<8sQ")
+
+# Shard layout, a directory next to the JSON file:
+#   manifest.json   - {"shards": {subject: {"file", "sections", "courses"}}}, in scrape order
+#   <SUBJECT>.ndjson - one compact section record per line
+MANIFEST_NAME = "manifest.json"
+
+
+def catalog_path_for(json_path: str) -> str:
+    """The catalog written alongside a `course_data_<TERM>.json` file."""
+    return os.path.splitext(json_path)[0] + ".catalog"
+
+
+def shard_dir_for(json_path: str) -> str:
+    """The shard directory written alongside a `course_data_<TERM>.json` file."""
+    return os.path.splitext(json_path)[0]
+
+
+def write_catalog(path: str, records: Iterable[dict]) -> None:
+    """Write section records as an indexed catalog, grouped by course ID."""
+    write_catalog_groups(path, [records])
+
+
+def write_catalog_groups(path: str, groups: Iterable[Iterable[dict]]) -> None:
+    """Write a catalog from groups of records (e.g. shards) without holding more than one group in memory.
+
+    Records are grouped by course ID within each group, so a course must not
+    be split across groups.
+    """
+    index = {}
+    offset = 0
+    # Write to temporary files first so readers never see a half-written catalog
+    tmp_path = f"{path}.tmp"
+    data_path = f"{path}.data.tmp"
+    with open(data_path, "w+b") as data:
+        for records in groups:
+            by_course: Dict[str, List[dict]] = {}
+            for record in records:
+                by_course.setdefault(record["course"], []).append(record)
+            for course_id, sections in by_course.items():
+                if course_id in index:
+                    raise ValueError(f"course {course_id} is split across catalog groups")
+                blob = json.dumps(sections, separators=(",", ":")).encode("utf-8")
+                index[course_id] = [offset, len(blob)]
+                data.write(blob)
+                offset += len(blob)
+        index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+
+        data.seek(0)
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(CATALOG_MAGIC, len(index_bytes)))
+            f.write(index_bytes)
+            shutil.copyfileobj(data, f)
+    os.remove(data_path)
+    os.replace(tmp_path, path)
+
+
+def write_atomic(path: str, lines: Iterable[str]) -> None:
+    """Write `lines` to `path` exactly as given, replacing it only once they are all written.
+
+    An interrupted run leaves the previous file (or none) rather than a half-written one.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.writelines(lines)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(directory: str) -> Dict[str, dict]:
+    """The shards listed in `directory`'s manifest, by subject. Raises FileNotFoundError if there is none."""
+    with open(os.path.join(directory, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        return json.load(f)["shards"]
+
+
+class ShardWriter:
+    """Writes section records as one NDJSON shard per subject, plus a manifest listing them.
+
+    Each shard is written as soon as its subject is done and the manifest is
+    rewritten after it, so an interrupted scrape keeps every finished subject
+    and a `resume`d one can skip them.
+    """
+
+    def __init__(self, directory: str, resume: bool = False):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.shards: Dict[str, dict] = {}
+        if resume and os.path.exists(os.path.join(directory, MANIFEST_NAME)):
+            self.shards = read_manifest(directory)
+        self._write_manifest()
+
+    def __contains__(self, subject: str) -> bool:
+        return subject in self.shards
+
+    def _write_manifest(self) -> None:
+        manifest = json.dumps({"shards": self.shards}, separators=(",", ":"))
+        write_atomic(os.path.join(self.directory, MANIFEST_NAME), [manifest])
+
+    def write(self, subject: str, records: List[dict]) -> None:
+        file_name = f"{subject}.ndjson"
+        write_atomic(
+            os.path.join(self.directory, file_name),
+            (json.dumps(record, separators=(",", ":")) + "\n" for record in records),
+        )
+        self.shards[subject] = {
+            "file": file_name,
+            "sections": len(records),
+            "courses": sorted({record["course"] for record in records}),
+        }
+        self._write_manifest()
+
+    def finish(self, subjects: Iterable[str]) -> None:
+        """Orders the manifest by `subjects` and drops shards of subjects no longer offered."""
+        subjects = list(subjects)
+        for subject in set(self.shards) - set(subjects):
+            os.remove(os.path.join(self.directory, self.shards.pop(subject)["file"]))
+        self.shards = {subject: self.shards[subject] for subject in subjects if subject in self.shards}
+        self._write_manifest()
+
+    def iter_shards(self) -> Iterator[List[dict]]:
+        """Each shard's records, one shard in memory at a time."""
+        for shard in self.shards.values():
+            yield _read_shard(self.directory, shard)
+
+
+def _read_shard(directory: str, shard: dict) -> List[dict]:
+    with open(os.path.join(directory, shard["file"]), "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_shard_entries(directory: str, course_ids: Optional[Iterable[str]] = None) -> List[dict]:
+    """Section records for the requested courses (or all), reading only the shards that hold them."""
+    shards = read_manifest(directory)
+    if course_ids is None:
+        return [entry for shard in shards.values() for entry in _read_shard(directory, shard)]
+    wanted = set(course_ids)
+    entries = []
+    for shard in shards.values():
+        if wanted.intersection(shard["courses"]):
+            entries.extend(entry for entry in _read_shard(directory, shard) if entry["course"] in wanted)
+    return entries
+
+
+class Catalog:
+    """Memory-mapped, read-only view of a catalog written by `write_catalog`.
+
+    Only the index is parsed up front; a course's sections are decoded when
+    they are asked for.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a course catalog")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_len = HEADER.unpack_from(self._map, 0)
+        if magic != CATALOG_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a course catalog")
+        self._data_start = HEADER.size + index_len
+        self.index: Dict[str, List[int]] = json.loads(self._map[HEADER.size : self._data_start])
+
+    def sections(self, course_id: str) -> List[dict]:
+        """Section records for `course_id`, or an empty list if it is not offered."""
+        if course_id not in self.index:
+            return []
+        offset, length = self.index[course_id]
+        start = self._data_start + offset
+        return json.loads(self._map[start : start + length])
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_course_entries(json_path: str, course_ids: Optional[Iterable[str]] = None) -> List[dict]:
+    """Section records for the requested courses, or for every course if `course_ids` is None.
+
+    Reads only those courses from the catalog next to `json_path` when one
+    exists and is at least as new as the JSON; otherwise falls back to loading
+    the whole JSON file, or to the shards in the directory of the same name
+    (also accepted as `json_path` itself) when there is no JSON file yet.
+    Raises FileNotFoundError if none of them exists.
+    """
+    if os.path.isdir(json_path):
+        return load_shard_entries(json_path, course_ids)
+    cat_path = json_path if json_path.endswith(".catalog") else catalog_path_for(json_path)
+    if os.path.exists(cat_path) and (
+        cat_path == json_path
+        or not os.path.exists(json_path)
+        or os.path.getmtime(cat_path) >= os.path.getmtime(json_path)
+    ):
+        with Catalog(cat_path) as catalog:
+            if course_ids is None:
+                course_ids = list(catalog.index)
+            return [entry for course_id in course_ids for entry in catalog.sections(course_id)]
+
+    shard_dir = shard_dir_for(json_path)
+    if not os.path.exists(json_path) and os.path.exists(os.path.join(shard_dir, MANIFEST_NAME)):
+        return load_shard_entries(shard_dir, course_ids)
+    with open(json_path, "r") as f:
+        entries = json.load(f)
+    if course_ids is None:
+        return entries
+    wanted = set(course_ids)
+    return [entry for entry in entries if entry["course"] in wanted]
@@ -1,17 +1,38 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import List, Literal
+from typing import List, Literal, Optional
 
 DayType = Literal["M", "T", "W", "R", "F", "(ARR)"]
 
 
+def clock_to_minutes(clock: str) -> Optional[int]:
+    """Converts '11:15AM' to minutes from midnight, or None if it is not a clock time."""
+    clock = clock.strip().upper()
+    if len(clock) < 6 or clock[-2:] not in ("AM", "PM") or ":" not in clock:
+        return None
+    hours, _, minutes = clock[:-2].partition(":")
+    if not (hours.isdigit() and minutes.isdigit() and 1 <= int(hours) <= 12 and int(minutes) < 60):
+        return None
+    return (int(hours) % 12 + (12 if clock.endswith("PM") else 0)) * 60 + int(minutes)
+
+
 @dataclass
 class CourseTiming:
     day: DayType
     begin: str
     end: str
     location: str
+    # Resolved from the strings above so readers never have to parse them
+    begin_minutes: Optional[int] = field(default=None, init=False)
+    end_minutes: Optional[int] = field(default=None, init=False)
+    arranged: bool = field(default=False, init=False)
+
+    def __post_init__(self) -> None:
+        self.arranged = any("ARR" in value.upper() for value in (self.day, self.begin, self.end))
+        if not self.arranged:
+            self.begin_minutes = clock_to_minutes(self.begin)
+            self.end_minutes = clock_to_minutes(self.end)
 
     @staticmethod
     def from_day_string(
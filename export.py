@@ -0,0 +1,85 @@
+import csv
+import json
+from itertools import product
+from typing import Dict, Iterable, Iterator, Optional, Sequence, TextIO, Tuple
+
+CSV_FIELDS = ["rank", "score", "crns", "courses", "meetings"]
+
+
+def schedule_record(rank: int, score: int, sections, objectives: Optional[Dict[str, int]] = None) -> dict:
+    """Machine-readable form of one ranked schedule, with its objective values when ranked by several."""
+    record = {
+        "rank": rank,
+        "score": score,
+        "crns": [s.crn for s in sections],
+        "sections": [
+            {
+                "course": s.course,
+                "crn": s.crn,
+                "title": s.title,
+                "modality": s.modality,
+                "meetings": [
+                    {
+                        "day": t["day"],
+                        "start": t["start"],
+                        "end": t["end"],
+                        "times": t["str_times"],
+                        "location": t["location"],
+                    }
+                    for t in s.timings
+                ],
+            }
+            for s in sections
+        ],
+    }
+    if objectives is not None:
+        record["objectives"] = objectives
+    return record
+
+
+def iter_ranked_schedules(ranked_groups: Iterable, limit: Optional[int] = None) -> Iterator[Tuple[int, int, tuple]]:
+    """(rank, score, sections) for each concrete schedule of ranked (score, group) pairs."""
+    rank = 0
+    for score, group in ranked_groups:
+        for sections in product(*group):
+            if limit is not None and rank == limit:
+                return
+            rank += 1
+            yield rank, score, sections
+
+
+class NdjsonWriter:
+    """Writes one compact JSON object per schedule."""
+
+    def __init__(self, out: TextIO, objectives: Sequence[str] = ()):
+        self.out = out
+
+    def write(self, rank: int, score: int, sections, objectives: Optional[Dict[str, int]] = None) -> None:
+        record = schedule_record(rank, score, sections, objectives)
+        self.out.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+class CsvWriter:
+    """Writes a header row, then one row per schedule; `objectives` adds one column per objective."""
+
+    def __init__(self, out: TextIO, objectives: Sequence[str] = ()):
+        self._writer = csv.writer(out)
+        self._objectives = list(objectives)
+        self._writer.writerow(CSV_FIELDS + self._objectives)
+
+    def write(self, rank: int, score: int, sections, objectives: Optional[Dict[str, int]] = None) -> None:
+        meetings = [f"{s.course} {t['day']} {t['str_times']} @ {t['location']}" for s in sections for t in s.timings]
+        row = [
+            rank,
+            score,
+            " ".join(s.crn for s in sections),
+            " ".join(s.course for s in sections),
+            "; ".join(meetings),
+        ]
+        self._writer.writerow(row + [objectives[name] for name in self._objectives] if objectives else row)
+
+
+WRITERS = {
+    "ndjson": NdjsonWriter,
+    "csv": CsvWriter,
+}
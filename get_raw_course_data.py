@@ -1,23 +1,33 @@
-import requests
+import argparse
+import atexit
+import os
+import sys
+import time
 from bs4 import BeautifulSoup
 import json
-from typing import List
-from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dataclasses import asdict
 
+from catalog import ShardWriter, shard_dir_for, write_atomic, write_catalog_groups
 from course import TimetableCourse, CourseTiming
+from http_session import PooledSession
+from profiling import FORMATS, Profiler, timed
+from scrape_cache import ScrapeCache, content_hash
 from subjects import get_subjects_from_web
 
 TERM = "202601"
 HOST = "selfservice.banner.vt.edu"
 RESOURCE = "ssb/HZSKVTSC.P_ProcRequest"
-URL = f"https://{HOST}/{RESOURCE}"
+BASE_URL = f"https://{HOST}"
 DEFAULT_HEADERS = {
     "Accept": "text/html",
 }
+MAX_WORKERS = 50
 
 
-def fetch_subject_courses_html(term_year: str, subject_code: str) -> str:
+def fetch_subject_courses_html(term_year: str, subject_code: str, session: PooledSession) -> str:
     payload = {
         "CAMPUS": "0",
         "TERMYEAR": term_year,
@@ -33,12 +43,8 @@ def fetch_subject_courses_html(term_year: str, subject_code: str) -> str:
         "inst_name": "",
     }
 
-    with requests.Session() as session:
-        print(f"Fetching data for subject {subject_code}...")
-        session.headers.update(DEFAULT_HEADERS)
-        response = session.post(URL, data=payload, timeout=10)
-        response.raise_for_status()
-        return response.text
+    print(f"Fetching data for subject {subject_code}...")
+    return session.post(RESOURCE, data=payload).text
 
 
 def _extract_table_from_html(html_content: str, subject: str):
@@ -56,6 +62,141 @@ def _extract_row_data(row) -> List[str]:
     return [td.get_text(strip=True) for td in table_data]
 
 
+class _UnsupportedMarkup(Exception):
+    """Raised by `_DataTableExtractor` for markup only a full HTML5 parser gets right."""
+
+
+class _DataTableExtractor(HTMLParser):
+    """Collects the rows of the first `dataentrytable` in a single pass.
+
+    Each row is the list of its <td> texts, every text node stripped and
+    joined exactly like `_extract_row_data`. Cells and rows left open are
+    closed the way an HTML5 parser would close them. Anything whose tree an
+    HTML5 parser would rebuild (nested tables, raw-text elements, block or
+    misnested tags inside a cell) raises `_UnsupportedMarkup` instead.
+    """
+
+    ROW_GROUPS = ("tbody", "thead", "tfoot")
+    UNSUPPORTED = frozenset(
+        {"table", "caption", "col", "colgroup", "script", "style", "template", "textarea", "select", "title", "xmp"}
+        | {"iframe", "noembed", "noframes", "noscript", "plaintext", "math", "svg", "html", "head", "body", "frameset"}
+    )
+    # Tags allowed inside a cell, as long as they are properly nested
+    CELL_INLINE = frozenset(
+        {"a", "b", "i", "u", "em", "strong", "span", "font", "small", "big", "abbr", "acronym", "sup", "sub", "code"}
+        | {"tt", "s", "strike"}
+    )
+    CELL_VOID = frozenset({"br", "img", "wbr"})
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.found = False
+        self.done = False
+        self.rows: List[List[str]] = []
+        self._row: Optional[List[str]] = None
+        # Text nodes of the open <td>; None outside one (or inside a <th>)
+        self._cell: Optional[List[str]] = None
+        self._cell_tag: Optional[str] = None
+        # Inline elements open inside the current cell
+        self._open: List[str] = []
+
+    def _close_cell(self) -> None:
+        if self._cell is not None:
+            self._row.append("".join(self._cell))
+        self._cell = None
+        self._cell_tag = None
+        self._open = []
+
+    def _close_row(self) -> None:
+        self._close_cell()
+        if self._row is not None:
+            self.rows.append(self._row)
+        self._row = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if not self.found:
+            classes = (dict(attrs).get("class") or "").split()
+            self.found = tag == "table" and "dataentrytable" in classes
+            return
+        if tag in self.UNSUPPORTED:
+            raise _UnsupportedMarkup(tag)
+        if self._cell_tag is not None and tag not in ("tr", "td", "th") and tag not in self.ROW_GROUPS:
+            if tag in self.CELL_VOID:
+                return
+            if tag not in self.CELL_INLINE or tag in self._open:
+                raise _UnsupportedMarkup(tag)
+            self._open.append(tag)
+            return
+        if tag == "tr" or tag in self.ROW_GROUPS:
+            self._close_row()
+            if tag == "tr":
+                self._row = []
+        elif tag in ("td", "th"):
+            self._close_cell()
+            if self._row is None:
+                self._row = []
+            self._cell_tag = tag
+            self._cell = [] if tag == "td" else None
+
+    def handle_startendtag(self, tag, attrs):
+        # HTML5 ignores the self-closing flag, so <td/> still opens a cell
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if not self.found or self.done:
+            return
+        if tag in ("td", "th"):
+            if tag == self._cell_tag:
+                self._close_cell()
+            elif self._cell_tag is not None:
+                raise _UnsupportedMarkup(tag)
+        elif tag == "tr" or tag in self.ROW_GROUPS:
+            self._close_row()
+        elif tag == "table":
+            self._close_row()
+            self.done = True
+        elif self._cell_tag is not None:
+            # An end tag that does not close the innermost open element is
+            # ignored or repaired by HTML5 parsers, which also merges text nodes
+            if not self._open or self._open[-1] != tag:
+                raise _UnsupportedMarkup(tag)
+            self._open.pop()
+
+    def handle_data(self, data):
+        if self._cell is not None and not self.done:
+            text = data.strip()
+            if text:
+                self._cell.append(text)
+
+    def close(self):
+        super().close()
+        if self.found and not self.done:
+            self._close_row()
+            self.done = True
+
+
+def _extract_rows_from_html(html_content: str, subject: str) -> Optional[List[List[str]]]:
+    """Cell text of every row of the data table, or None if the page has no table.
+
+    Uses `_DataTableExtractor`, falling back to a full html5lib parse for
+    markup it does not handle, so the rows are always the same.
+    """
+    extractor = _DataTableExtractor()
+    try:
+        # HTML5 parsers normalize line endings before tokenizing
+        extractor.feed(html_content.replace("\r\n", "\n").replace("\r", "\n"))
+        extractor.close()
+    except _UnsupportedMarkup:
+        table = _extract_table_from_html(html_content, subject)
+        return None if table is None else [_extract_row_data(row) for row in table.find_all("tr")]
+    if not extractor.found:
+        print(f"No data table found for subject {subject}.")
+        return None
+    return extractor.rows
+
+
 def _handle_full_course_row(data: List[str], courses: List[TimetableCourse]) -> None:
     """Handle a row with 13 columns representing a complete course."""
     courses.append(TimetableCourse.from_data(*data))
@@ -151,33 +292,179 @@ def _process_row(data: List[str], courses: List[TimetableCourse]) -> None:
 
 def parse_schedule_html(html_content: str, subject: str) -> List[TimetableCourse]:
     """Parse HTML course schedule and extract course information."""
-    table = _extract_table_from_html(html_content, subject)
-    if table is None:
+    rows = _extract_rows_from_html(html_content, subject)
+    if rows is None:
         print(f"No courses found for subject {subject} (no table). Skipping {subject}.")
         return []
     courses = []
-    header_row, *data_rows = table.find_all("tr")
+    header_row, *data_rows = rows
     print(f"Parsing courses for subject {subject}... Found {len(data_rows)} data rows.")
-    for row in data_rows:
-        data = _extract_row_data(row)
+    for data in data_rows:
         _process_row(data, courses)
 
     return courses
 
 
-def get_all_courses_for_subject(subject_code: str) -> List[TimetableCourse]:
-    html_source = fetch_subject_courses_html(TERM, subject_code)
+def get_all_courses_for_subject(subject_code: str, session: PooledSession) -> List[TimetableCourse]:
+    html_source = fetch_subject_courses_html(TERM, subject_code, session)
     return parse_schedule_html(html_source, subject_code)
 
 
+def _timed_parse(html_content: str, subject: str) -> Tuple[List[TimetableCourse], float, float]:
+    """`parse_schedule_html`, plus the wall and CPU seconds it took in the parser process."""
+    wall, cpu = time.perf_counter(), time.process_time()
+    courses = parse_schedule_html(html_content, subject)
+    return courses, time.perf_counter() - wall, time.process_time() - cpu
+
+
+def _finished_parses(parses, cache: ScrapeCache, wait: bool, profiler: Optional[Profiler]):
+    """Yields (subject, records) for parses that are done, or for all of them once done if `wait`."""
+    for parse in as_completed(list(parses)) if wait else [parse for parse in parses if parse.done()]:
+        subject, html_hash = parses.pop(parse)
+        courses, wall, cpu = parse.result()
+        records = [asdict(course) for course in courses]
+        cache.store_records(subject, html_hash, records)
+        if profiler is not None:
+            profiler.record("parse", wall, cpu, item=subject)
+            profiler.count("subjects parsed")
+        yield subject, records
+
+
+def _parse_pages(pages, cache: ScrapeCache, parsers, profiler: Optional[Profiler] = None):
+    """Yields (subject, section records) for each (subject, html) page as soon as it is ready.
+
+    Unchanged pages reuse their cached parse; the others are parsed in the
+    `parsers` pool and stored in the cache.
+    """
+    parses = {}
+    for subject, html_content in pages:
+        html_hash = content_hash(html_content)
+        cached = cache.records(subject, html_hash)
+        if cached is not None:
+            print(f"Subject {subject} unchanged, reusing {len(cached)} cached sections.")
+            if profiler is not None:
+                profiler.count("subjects reused")
+            yield subject, cached
+        else:
+            cache.store_html(subject, html_content)
+            parses[parsers.submit(_timed_parse, html_content, subject)] = (subject, html_hash)
+        yield from _finished_parses(parses, cache, False, profiler)
+    yield from _finished_parses(parses, cache, True, profiler)
+
+
+def _fetch_pages(session: PooledSession, subjects: List[str], workers: int, profiler: Optional[Profiler] = None):
+    """Yields (subject, html) pairs as downloads complete."""
+
+    def fetch(subject: str) -> str:
+        start = time.perf_counter()
+        html_content = fetch_subject_courses_html(TERM, subject, session)
+        if profiler is not None:
+            # Latency only: the thread mostly waits on the network
+            profiler.record("fetch", time.perf_counter() - start, item=subject)
+            profiler.count("bytes fetched", len(html_content))
+        return html_content
+
+    with ThreadPoolExecutor(max_workers=workers) as fetchers:
+        fetches = {fetchers.submit(fetch, subject): subject for subject in subjects}
+        for future in as_completed(fetches):
+            yield fetches[future], future.result()
+
+
+def _cached_pages(cache: ScrapeCache, subjects: List[str]):
+    """Yields (subject, html) pairs for every subject with a cached page."""
+    for subject in subjects:
+        html_content = cache.html(subject)
+        if html_content is None:
+            print(f"No cached page for subject {subject}, skipping.")
+        else:
+            yield subject, html_content
+
+
+def _course_json_lines(shards: Iterable[List[dict]]) -> Iterator[str]:
+    separator = "[\n"
+    for records in shards:
+        for record in records:
+            yield separator + json.dumps(record, separators=(",", ":"))
+            separator = ",\n"
+    yield "[]\n" if separator == "[\n" else "\n]\n"
+
+
+def _write_course_json(path: str, shards: Iterable[List[dict]]) -> None:
+    """Writes every shard's records as one JSON array, one shard in memory at a time."""
+    write_atomic(path, _course_json_lines(shards))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=f"Scrape the timetable for term {TERM}")
+    parser.add_argument("--base-url", default=BASE_URL, help="Registrar server to scrape (e.g. a local stand-in)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Most requests in flight at once")
+    parser.add_argument("--retries", type=int, default=4, help="Retries per request on transient errors")
+    parser.add_argument("--parsers", type=int, default=os.cpu_count() or 1, help="Processes parsing fetched pages")
+    parser.add_argument(
+        "--cache-dir", default=f"scrape_cache_{TERM}", help="Where each subject's raw page and parsed sections are kept"
+    )
+    parser.add_argument(
+        "--offline", action="store_true", help="Rebuild the course data from the cache without fetching"
+    )
+    parser.add_argument(
+        "--resume", action="store_true", help="Keep the subjects an interrupted run already wrote and scrape the rest"
+    )
+    parser.add_argument(
+        "--profile",
+        "--stats",
+        nargs="?",
+        const="table",
+        choices=FORMATS,
+        help="On exit, print fetch latency and parse time per subject, totals and peak memory to stderr",
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.parsers < 1:
+        parser.error("--parsers must be at least 1")
+    if args.retries < 0:
+        parser.error("--retries must be at least 0")
+
+    profiler = None
+    if args.profile:
+        profiler = Profiler()
+        atexit.register(profiler.write, sys.stderr, args.profile)
+
+    json_path = f"course_data_{TERM}.json"
+    cache = ScrapeCache(args.cache_dir)
+    # Each subject's records go to its own shard as soon as they are ready, so memory stays
+    # bounded by one subject and an interrupted run can be resumed
+    shards = ShardWriter(shard_dir_for(json_path), resume=args.resume)
+    # Threads only fetch; each changed page is handed to a parser process as soon as it
+    # arrives, so parsing is not serialized behind the network threads by the GIL
+    with ProcessPoolExecutor(args.parsers) as parsers, timed(profiler, "pipeline"):
+        if args.offline:
+            subject_list = cache.subjects()
+            if subject_list is None:
+                parser.error(f"--offline needs a previous online run to have filled {args.cache_dir}")
+            subjects = [e[0] for e in subject_list]
+            pages = _cached_pages(cache, [subject for subject in subjects if subject not in shards])
+            for subject, records in _parse_pages(pages, cache, parsers, profiler):
+                shards.write(subject, records)
+        else:
+            with PooledSession(args.base_url, args.workers, args.retries, headers=DEFAULT_HEADERS) as session:
+                with timed(profiler, "subjects"):
+                    subject_list = get_subjects_from_web(TERM, session)
+                cache.save_subjects(subject_list)
+                subjects = [e[0] for e in subject_list]
+                todo = [subject for subject in subjects if subject not in shards]
+                pages = _fetch_pages(session, todo, args.workers, profiler)
+                for subject, records in _parse_pages(pages, cache, parsers, profiler):
+                    shards.write(subject, records)
+    shards.finish(subjects)
+
+    with timed(profiler, "write"):
+        _write_course_json(json_path, shards.iter_shards())
+        # Indexed copy so main.py can read just the requested courses
+        write_catalog_groups(f"course_data_{TERM}.catalog", shards.iter_shards())
+    if profiler is not None:
+        profiler.count("sections", sum(shard["sections"] for shard in shards.shards.values()))
+
+
 if __name__ == "__main__":
-    all_courses = []
-    with ThreadPoolExecutor(max_workers=50) as executor:
-        results = executor.map(
-            get_all_courses_for_subject,
-            [e[0] for e in get_subjects_from_web(TERM)],
-        )
-        for course_list in results:
-            all_courses.extend(course_list)
-    with open(f"course_data_{TERM}.json", "w") as f:
-        json.dump([asdict(course) for course in all_courses], f, indent=2)
+    main()
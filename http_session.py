@@ -0,0 +1,130 @@
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Responses worth retrying: rate limiting and server-side hiccups
+TRANSIENT_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class AdaptiveLimiter:
+    """Caps the number of requests in flight, adapting the cap as responses come back.
+
+    Additive increase, multiplicative decrease: every success raises the cap
+    by about one per cap's worth of requests, every failed attempt halves it,
+    and a response slower than `slow_factor` times the running average
+    latency trims it slightly. The cap stays within [minimum, maximum].
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 50, slow_factor: float = 2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.slow_factor = slow_factor
+        self.average_latency: Optional[float] = None
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def record(self, latency: float, ok: bool) -> None:
+        """Adjusts the cap after one attempt that took `latency` seconds."""
+        with self._cond:
+            if not ok:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                average = self.average_latency
+                if average is not None and latency > self.slow_factor * average:
+                    self.limit = max(self.minimum, self.limit * 0.9)
+                else:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                self.average_latency = latency if average is None else 0.9 * average + 0.1 * latency
+            self._cond.notify_all()
+
+
+class PooledSession:
+    """One `requests.Session` shared by every worker thread of a scrape.
+
+    The connection pool is sized to `workers` so connections are reused
+    instead of reopened per request. Connection errors, timeouts and
+    `TRANSIENT_STATUS` responses are retried up to `retries` times with
+    jittered exponential backoff (or the server's Retry-After), and an
+    `AdaptiveLimiter` decides how many requests may be in flight at once.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        workers: int = 50,
+        retries: int = 4,
+        backoff: float = 0.5,
+        timeout: float = 10,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self.limiter = AdaptiveLimiter(initial=min(8, workers), maximum=workers)
+
+    def request(self, method: str, resource: str, **kwargs) -> requests.Response:
+        """Sends one request to `resource` under the base URL, retrying transient failures."""
+        url = f"{self.base_url}/{resource}"
+        attempt = 0
+        while True:
+            with self.limiter:
+                start = time.monotonic()
+                try:
+                    response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+                except (requests.ConnectionError, requests.Timeout):
+                    self.limiter.record(time.monotonic() - start, ok=False)
+                    if attempt >= self.retries:
+                        raise
+                    retry_after = None
+                else:
+                    transient = response.status_code in TRANSIENT_STATUS
+                    self.limiter.record(time.monotonic() - start, ok=not transient)
+                    if not transient or attempt >= self.retries:
+                        response.raise_for_status()
+                        return response
+                    retry_after = response.headers.get("Retry-After")
+            time.sleep(self._delay(attempt, retry_after))
+            attempt += 1
+
+    def get(self, resource: str, **kwargs) -> requests.Response:
+        return self.request("GET", resource, **kwargs)
+
+    def post(self, resource: str, **kwargs) -> requests.Response:
+        return self.request("POST", resource, **kwargs)
+
+    def _delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after is not None and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * 2**attempt * random.uniform(0.5, 1.5)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,42 +1,40 @@
-import json
 import argparse
-import sys
+import atexit
 import os
+import re
+import sys
+import threading
 from datetime import datetime
-from itertools import product
-from collections import defaultdict
-
-# Try to import rich; exit gracefully if not installed
-try:
-    from rich.console import Console
-    from rich.table import Table
-    from rich import box
-    from rich.panel import Panel
-    from rich.text import Text
-    from rich.style import Style
-    from rich.align import Align
-except ImportError:
-    print("This tool requires the 'rich' library for visuals.")
-    print("Please run: pip install rich")
-    sys.exit(1)
+from itertools import chain
+
+from catalog import load_course_entries
+from export import WRITERS, iter_ranked_schedules
+from profiling import FORMATS, Profiler, timed
+from solver import (
+    CAMPUS_TIME,
+    ExpandedSchedules,
+    ParallelSearch,
+    ScheduleCollector,
+    SearchSpace,
+    combination_count,
+    extend_scored,
+    filter_scored,
+    group_size,
+    in_search_order,
+    iter_added_groups,
+    occupancy_mask,
+    parse_objectives,
+    score_groups,
+)
 
 # --- Configuration & Constants ---
 
 DATE_FMT = "%I:%M%p"  # Matches "11:15AM"
-DAYS_ORDER = [
-    "M",
-    "T",
-    "W",
-    "R",
-    "F",
-]
-DAY_NAMES = {
-    "M": "Mon",
-    "T": "Tue",
-    "W": "Wed",
-    "R": "Thu",
-    "F": "Fri",
-}
+
+# Searches over more section combinations than this get a warning; over
+# --max-combinations they are refused unless only the best few are kept
+LARGE_SEARCH_WARNING = 10**7
+DEFAULT_MAX_COMBINATIONS = 10**12
 
 # Map shorthand user inputs to the JSON data strings
 MODALITY_MAP = {
@@ -57,108 +55,139 @@ COURSE_COLORS = [
     "bright_white",
 ]
 
-# Grid Configuration
-GRID_START_HOUR = 8  # 8 AM
-GRID_END_HOUR = 20  # 8 PM
-GRID_INTERVAL = 15  # Minutes
-START_MINS = GRID_START_HOUR * 60
-END_MINS = GRID_END_HOUR * 60
-TOTAL_SLOTS = (END_MINS - START_MINS) // GRID_INTERVAL
+# Strips rich markup such as "[bold red]" from messages printed without rich
+MARKUP_TAG = re.compile(r"\[/?[a-z][a-z0-9 _#]*\]")
+
+# Credit hours as scraped, e.g. "3" or "1 TO 3" for variable-credit sections
+CREDIT_HOURS = re.compile(r"\d+(?:\.\d+)?")
 
-console = Console()
+# Pager commands that edit the search in place, e.g. "latest 03:00PM" or "add CS-3114"
+EDIT_COMMANDS = ("earliest", "latest", "mode", "add", "drop")
 
 # --- Helper Functions ---
 
 
+def numpy_engine():
+    """The `NumpyEngine` class, or None when NumPy is not installed.
+
+    NumPy is optional and slow to import, so it is only loaded for `--engine numpy`.
+    """
+    try:
+        from numpy_engine import NumpyEngine
+    except ImportError:
+        return None
+    return NumpyEngine
+
+
 def parse_time(time_str):
     """Converts '11:15AM' to minutes from midnight."""
     dt = datetime.strptime(time_str, DATE_FMT)
     return dt.hour * 60 + dt.minute
 
 
-def minutes_to_str(minutes):
-    """Converts minutes back to compact '8:15' or '13:45' format."""
-    h = minutes // 60
-    m = minutes % 60
-    # Using 24h format internally for the grid labels looks cleaner
-    return f"{h:02d}:{m:02d}"
+def parse_credit_hours(text):
+    """Credit hours of a section; variable-credit ranges count as their minimum, unknown as 0."""
+    match = CREDIT_HOURS.search(text or "")
+    return float(match.group()) if match else 0.0
 
 
-def clear_screen():
-    os.system("cls" if os.name == "nt" else "clear")
+def parse_credit_range(text):
+    """Converts '15-18' (or just '15') to an inclusive (low, high) pair of credit hours."""
+    low, _, high = text.partition("-")
+    low = float(low)
+    high = float(high) if high else low
+    if low > high:
+        raise ValueError(f"empty credit range '{text}'")
+    return low, high
 
 
 class CourseSection:
+    __slots__ = (
+        "crn",
+        "course",
+        "title",
+        "modality",
+        "credits",
+        "color_name",
+        "timings",
+        "is_arranged",
+        "mask",
+        "_fill_style",
+    )
+
     def __init__(self, data, color_idx):
         self.crn = data["crn"]
         self.course = data["course"]
         self.title = data["title"]
         self.modality = data["modality"]
+        self.credits = parse_credit_hours(data.get("credit_hours"))
         self.color_name = COURSE_COLORS[color_idx % len(COURSE_COLORS)]
-        # Create the style used for background filling
-        self.fill_style = Style(bgcolor=self.color_name)
+        self._fill_style = None
         self.timings = []
         self.is_arranged = True
 
         if "timing" in data and data["timing"]:
             for t in data["timing"]:
-                is_arr_marker = False
-                for fld in ("day", "begin", "end"):
-                    val = t.get(fld, "")
-                    if isinstance(val, str) and "ARR" in val.upper():
-                        is_arr_marker = True
-                        break
-
-                if is_arr_marker:
-                    continue
+                if "arranged" in t:
+                    # Newer scrapes resolve ARR markers and clock times up front
+                    if t["arranged"]:
+                        continue
+                    start, end = t["begin_minutes"], t["end_minutes"]
+                else:
+                    is_arr_marker = False
+                    for fld in ("day", "begin", "end"):
+                        val = t.get(fld, "")
+                        if isinstance(val, str) and "ARR" in val.upper():
+                            is_arr_marker = True
+                            break
+
+                    if is_arr_marker:
+                        continue
+                    start, end = parse_time(t["begin"]), parse_time(t["end"])
 
                 self.is_arranged = False
                 self.timings.append(
                     {
                         "day": t["day"],
-                        "start": parse_time(t["begin"]),
-                        "end": parse_time(t["end"]),
+                        "start": start,
+                        "end": end,
                         "location": t.get("location", "Unknown"),
                         "str_times": f"{t['begin']}-{t['end']}",
                     }
                 )
 
-    def __repr__(self):
-        return f"[{self.course}]"
+        self.mask = occupancy_mask(self.timings)
 
+    @property
+    def fill_style(self):
+        """Background style used for this section's grid cells, built on first draw."""
+        if self._fill_style is None:
+            from rich.style import Style
 
-# --- Logic: Conflicts & Scoring ---
+            self._fill_style = Style(bgcolor=self.color_name)
+        return self._fill_style
 
+    def __repr__(self):
+        return f"[{self.course}]"
 
-def has_conflict(schedule):
-    day_map = defaultdict(list)
-    for section in schedule:
-        for t in section.timings:
-            day_map[t["day"]].append((t["start"], t["end"]))
 
-    for day, slots in day_map.items():
-        slots.sort(key=lambda x: x[0])
-        for i in range(len(slots) - 1):
-            # If current ends after next starts -> Conflict
-            if slots[i][1] > slots[i + 1][0]:
-                return True
-    return False
+def load_sections(path, courses, profiler=None):
+    """Sections of `courses` from the course data at `path`, per course in `courses` order.
 
+    Only the requested courses are read when an indexed catalog is available.
+    Each course gets a stable color index from its position in `courses`.
+    """
+    with timed(profiler, "load"):
+        raw_data = load_course_entries(path, set(courses))
+    course_color_map = {code: i for i, code in enumerate(courses)}
+    sections_by_course = {code: [] for code in courses}
+    with timed(profiler, "sections"):
+        for entry in raw_data:
+            sections_by_course[entry["course"]].append(CourseSection(entry, course_color_map[entry["course"]]))
+    return sections_by_course
 
-def calculate_campus_time(schedule):
-    day_stats = {}
-    for section in schedule:
-        for t in section.timings:
-            day = t["day"]
-            if day not in day_stats:
-                day_stats[day] = {"min": float("inf"), "max": float("-inf")}
-            day_stats[day]["min"] = min(day_stats[day]["min"], t["start"])
-            day_stats[day]["max"] = max(day_stats[day]["max"], t["end"])
 
-    total_minutes = 0
-    for day in day_stats:
-        total_minutes += day_stats[day]["max"] - day_stats[day]["min"]
-    return total_minutes
+# --- Logic: Constraints ---
 
 
 def meets_constraints(section, earliest, latest, allowed_modalities):
@@ -175,205 +204,536 @@ def meets_constraints(section, earliest, latest, allowed_modalities):
     return True
 
 
-# --- Visualization (The "Rich" Part) ---
-
-
-def get_slot_index(time_mins):
-    """Maps a minute value to the nearest downward 15-minute grid slot index."""
-    if time_mins < START_MINS:
-        return 0
-    if time_mins >= END_MINS:
-        return TOTAL_SLOTS - 1
-    return (time_mins - START_MINS) // GRID_INTERVAL
+# --- Interactive Session ---
 
 
-def render_schedule(schedule_obj, index, total):
-    sections = schedule_obj["sections"]
-    score = schedule_obj["score"]
-
-    # 1. Header
-    hours = score // 60
-    mins = score % 60
-    header = Panel(
-        Align.center(
-            Text(f"Schedule Option {index + 1} of {total}\n", style="bold white on blue")
-            + Text(f"Total Campus Burden: {hours}h {mins}m", style="italic grey85 on blue")
-        ),
-        box=box.ROUNDED,
-        style="on blue",
-    )
+def parse_modes(mode_arg):
+    """Maps comma-separated shorthand modes to catalog modality names.
 
-    # 2. Build the 15-Minute Grid System
-
-    # Initialize grid with empty spaces.
-    # grid_data[slot_index][day_index]
-    # Using 6 spaces to ensure the cell has width even when empty
-    empty_cell = Text("      ")
-    grid_data = [[empty_cell for _ in range(5)] for _ in range(TOTAL_SLOTS)]
-
-    arr_courses = []
-
-    # Populate the grid data
-    for section in sections:
-        if section.is_arranged:
-            arr_courses.append(section)
-            continue
-
-        # Create the solid color block text
-        # Using spaces with a background color style
-        color_block = Text("      ", style=section.fill_style)
-
-        for t in section.timings:
-            if t["day"] not in DAYS_ORDER:
-                continue
-
-            day_idx = DAYS_ORDER.index(t["day"])
-
-            # Calculate start and end slots.
-            # End slot: subtracting 1 minute ensures that a class ending at 10:15
-            # does not occupy the 10:15-10:30 slot.
-            start_slot = get_slot_index(t["start"])
-            end_slot = get_slot_index(t["end"] - 1)
-
-            for i in range(start_slot, end_slot + 1):
-                grid_data[i][day_idx] = color_block
-
-    # 3. Construct the Rich Table
-    # Using box.SIMPLE_HEAVY for thicker outer borders, but minimalist inner lines
-    table = Table(box=box.SIMPLE_HEAVY, show_lines=False, header_style="bold", padding=(0, 0))
-    table.add_column("Time", style="dim", width=6, justify="right")
-    for day in DAYS_ORDER:
-        table.add_column(DAY_NAMES[day], justify="center", width=8)
-
-    curr_time = START_MINS
-    for row_idx, row_content in enumerate(grid_data):
-        # Only label hours to reduce noise, or label everything for precision. Let's try labelling everything subtly.
-        time_label = minutes_to_str(curr_time)
-
-        # Add styling to make the hour markers stand out slightly more than 15/30/45 markers
-        if curr_time % 60 == 0:
-            time_label = Text(time_label, style="bold white")
+    Returns the modality names and any shorthand that was not recognised.
+    """
+    allowed_modes = []
+    unknown = []
+    for m in mode_arg.split(","):
+        if m.lower() in MODALITY_MAP:
+            allowed_modes.append(MODALITY_MAP[m.lower()])
         else:
-            time_label = Text(time_label, style="dim grey50")
-
-        table.add_row(time_label, *row_content)
-        curr_time += GRID_INTERVAL
-
-    # 4. Legend and Details Panel
-    legend_items = []
-    for s in sections:
-        # Create a small color swatch
-        swatch = Text("  ", style=s.fill_style)
-
-        details = Text(f" {s.course} ({s.crn})", style="bold " + s.color_name)
-        details.append(f" | {s.title}\n", style="dim")
-
-        if s.is_arranged:
-            details.append("   -> Arranged / Online Async\n", style="italic grey70")
+            unknown.append(m)
+    return allowed_modes, unknown
+
+
+class ScheduleSession:
+    """Courses, constraints and search results for one run of the tool.
+
+    Every section of the requested courses is built once and kept unfiltered,
+    so pager edits re-solve in memory. When the previous search has finished
+    and kept every schedule, tightening a constraint only filters the results
+    already found and relaxing one only searches schedules that use a newly
+    allowed section. Otherwise (e.g. with --top, or when choosing among
+    optional courses) the search is rerun over the cached sections.
+
+    Courses in `optional` may be left out of a schedule; `choose` and
+    `credits` are the (low, high) limits on how many of them are taken and on
+    total credit hours (see `SearchSpace`). Schedules are ranked by `model`
+    (a `ScoreModel`). With a `profiler`, building the search space and
+    searching are timed and the search's counters kept.
+    """
+
+    def __init__(
+        self,
+        args,
+        sections_by_course,
+        earliest,
+        latest,
+        modes,
+        optional=(),
+        choose=None,
+        credits=None,
+        profiler=None,
+        model=CAMPUS_TIME,
+    ):
+        self.args = args
+        self.sections_by_course = sections_by_course
+        self.courses = list(sections_by_course)
+        self.earliest = earliest
+        self.latest = latest
+        self.modes = modes
+        self.optional = set(optional)
+        self.choose = choose
+        self.credits = credits
+        self.profiler = profiler
+        self.model = model
+        self.collector = None
+        self._space = None
+        self._search = None
+
+    def allowed(self, section):
+        return meets_constraints(section, self.earliest, self.latest, self.modes)
+
+    def buckets(self):
+        return {c: [s for s in self.sections_by_course[c] if self.allowed(s)] for c in self.courses}
+
+    def empty_courses(self):
+        """Required courses with no section that meets the constraints."""
+        buckets = self.buckets()
+        return [c for c in self.courses if not buckets[c] and c not in self.optional]
+
+    def cancel(self):
+        """Stops the running search, including any worker processes it uses."""
+        if self.collector is not None:
+            self.collector.cancel()
+        if self._search is not None:
+            self._search.stop()
+            self._search = None
+
+    def _start(self, scored):
+        # Callers cancel the previous search before building `scored`, which may start a new one
+        self.collector = ScheduleCollector(limit=self.args.top)
+        threading.Thread(target=self.collector.consume, args=(scored,), daemon=True).start()
+
+    def _previous_results(self):
+        """All results of the last search, or None if they cannot be reused."""
+        collector = self.collector
+        if collector is None or not collector.done or collector.cancelled or collector.limit is not None:
+            return None
+        # Filtering and extending results does not know about course-selection limits,
+        # and a Pareto front can lose members to schedules found later
+        if self.optional or self.credits is not None or self.args.pareto:
+            return None
+        return collector.ranked()
+
+    def space(self):
+        """The compiled search space for the current courses and constraints."""
+        if self._space is None:
+            with timed(self.profiler, "space"):
+                self._space = SearchSpace(
+                    self.buckets(),
+                    self.courses,
+                    optional=self.optional,
+                    choose=self.choose,
+                    credits=self.credits,
+                    model=self.model,
+                )
+            if self.profiler is not None:
+                self._space.stats = self.profiler.counters
+                # Listed even when a search never gets to count them
+                self.profiler.counters.update(dict.fromkeys(("candidates", "conflicts", "pruned"), 0))
+        return self._space
+
+    def scored(self):
+        """(score, group) pairs for the current courses and constraints, from the selected engine."""
+        args = self.args
+        space = self.space()
+        engine = numpy_engine() if args.engine == "numpy" else None
+        if args.pareto:
+            scored = ((score, space.group(chosen)) for score, chosen in space.pareto_front())
+        elif args.optimize:
+            scored = score_groups(space.iter_best_groups(args.top), space.model)
+        elif args.workers > 1:
+            scored = self._search = ParallelSearch(space, args.workers, args.top)
+        elif engine is not None:
+            scored = engine(space).iter_scored()
         else:
-            for t in s.timings:
-                details.append(f"   -> {t['day']} {t['str_times']} @ {t['location']}\n", style="grey70")
-
-        legend_items.append(Text.assemble(swatch, details))
-
-    legend_panel = Panel(
-        Align.left(Text("\n").join(legend_items)), title="Course Legend & Details", border_style="blue", box=box.ROUNDED
-    )
-
-    # 5. Render Layout
-    clear_screen()
-    console.print(header)
-    console.print(table, justify="center")
-    console.print(legend_panel)
-    console.print(
-        Align.center(
-            "[bold]Controls:[/bold] [green]N[/green] (Next) | [green]P[/green] (Prev) | [yellow]Goto #[/yellow] | [red]Q[/red] (Quit)"
-        ),
-        style="on grey15",
-    )
+            scored = score_groups(space.iter_groups(), space.model)
+        return scored if self.profiler is None else self.profiler.timed_iter("search", scored)
+
+    def solve(self):
+        """Searches from scratch with the current courses and constraints."""
+        self.cancel()
+        self._start(self.scored())
+
+    def set_constraints(self, earliest, latest, modes):
+        previous = self._previous_results()
+        self.cancel()
+        old_buckets = self.buckets()
+        self.earliest, self.latest, self.modes = earliest, latest, modes
+        self._space = None
+        if previous is None:
+            self.solve()
+            return
+
+        kept_buckets = {}
+        added_buckets = {}
+        for course, sections in self.buckets().items():
+            old_ids = {id(s) for s in old_buckets[course]}
+            kept_buckets[course] = [s for s in sections if id(s) in old_ids]
+            added_buckets[course] = [s for s in sections if id(s) not in old_ids]
+        self._start(
+            in_search_order(
+                chain(
+                    filter_scored(previous, self.allowed),
+                    score_groups(
+                        iter_added_groups(kept_buckets, added_buckets, list(self.courses), self.model), self.model
+                    ),
+                ),
+                self.space(),
+            )
+        )
+
+    def add_course(self, course, sections):
+        previous = self._previous_results()
+        self.cancel()
+        self.sections_by_course[course] = sections
+        self.courses.append(course)
+        self._space = None
+        if previous is None:
+            self.solve()
+        else:
+            scored = extend_scored(previous, [s for s in sections if self.allowed(s)], self.model)
+            self._start(in_search_order(scored, self.space()))
+
+    def drop_course(self, course):
+        # Dropping a course can make schedules valid that were not before, so search again
+        del self.sections_by_course[course]
+        self.courses.remove(course)
+        self.optional.discard(course)
+        self._space = None
+        self.solve()
+
+
+def incompatible_message(course, other):
+    return f"No section of '{course}' fits with any usable section of '{other}'."
+
+
+def apply_edit(session, command, value):
+    """Applies one pager edit command to `session` and returns a status message."""
+    cleared = value in ("", "-")
+    if command in ("earliest", "latest"):
+        try:
+            minutes = None if cleared else parse_time(value.upper())
+        except ValueError:
+            return f"[red]Could not read time '{value}' (expected e.g. 09:00AM).[/red]"
+        if command == "earliest":
+            session.set_constraints(minutes, session.latest, session.modes)
+        else:
+            session.set_constraints(session.earliest, minutes, session.modes)
+        status = f"[green]{command.capitalize()} set to {'none' if cleared else value.upper()}.[/green]"
+    elif command == "mode":
+        modes, unknown = ([], []) if cleared else parse_modes(value)
+        if unknown:
+            return f"[red]Unknown mode '{unknown[0]}'. Options: f2f, hybrid, sync, async[/red]"
+        session.set_constraints(session.earliest, session.latest, modes)
+        status = f"[green]Mode set to {'any' if cleared else value}.[/green]"
+    elif command == "add":
+        course = value.upper()
+        if course in session.courses:
+            return f"[yellow]{course} is already in the schedule.[/yellow]"
+        sections = [CourseSection(e, len(session.courses)) for e in load_course_entries(session.args.file, [course])]
+        if not sections:
+            return f"[red]No sections found for '{course}'.[/red]"
+        session.add_course(course, sections)
+        status = f"[green]Added {course}.[/green]"
+    else:
+        course = value.upper()
+        if course not in session.courses:
+            return f"[yellow]{course} is not in the schedule.[/yellow]"
+        if len(session.courses) == 1:
+            return "[yellow]Cannot drop the only course.[/yellow]"
+        session.drop_course(course)
+        status = f"[green]Dropped {course}.[/green]"
+
+    empty = session.empty_courses()
+    if empty:
+        status += f" [red]No sections of {', '.join(empty)} match the constraints.[/red]"
+    elif session.space().incompatible:
+        status += f" [red]{incompatible_message(*session.space().incompatible)}[/red]"
+    return status
+
+
+# --- Headless Output ---
+
+
+def report(message, headless=False):
+    """Prints a rich-markup status message; headless runs get plain text on stderr."""
+    if headless:
+        print(MARKUP_TAG.sub("", message), file=sys.stderr)
+    else:
+        from render import console
+
+        console.print(message)
+
+
+def count_found(scored, profiler):
+    """Passes (score, group) pairs through, counting the concrete schedules in each group as found."""
+    for score, group in scored:
+        profiler.count("schedules found", group_size(group))
+        yield score, group
+
+
+def write_schedules(session, writer):
+    """Writes the ranked schedules of `session` with `writer`; returns how many were written.
+
+    Best-first search (--optimize) already produces schedules in rank order, so
+    each one is written and flushed as soon as it is found; otherwise the
+    search has to finish before the ranking is known.
+    """
+    args = session.args
+    profiler = session.profiler
+    if args.optimize:
+        ranked = session.scored()
+    else:
+        collector = ScheduleCollector(limit=args.top)
+        scored = session.scored()
+        if profiler is not None:
+            scored = count_found(scored, profiler)
+        collector.consume(scored)
+        with timed(profiler, "rank"):
+            ranked = collector.ranked()
+
+    model = session.model
+    written = 0
+    for written, score, sections in iter_ranked_schedules(ranked, args.top):
+        with timed(profiler, "output"):
+            objectives = None
+            if args.objective:
+                values = model.values(model.state_of(sections))
+                objectives = {name: values[name] for name in model.names}
+            writer.write(written, score, sections, objectives)
+            if args.optimize:
+                sys.stdout.flush()
+    if profiler is not None:
+        profiler.count("schedules written", written)
+    return written
 
 
 # --- Main ---
 
 
-def main():
+def build_parser():
+    """The command-line parser; benchmarks build the same arguments from it."""
     parser = argparse.ArgumentParser(description="Visual University Schedule Generator")
     parser.add_argument("courses", nargs="+", help="List of Course IDs")
-    parser.add_argument("--file", default="courses.json", help="Path to JSON file")
+    parser.add_argument("--optional", nargs="+", default=[], help="Course IDs that may be left out of a schedule")
+    parser.add_argument("--choose", type=int, help="Take exactly this many of the --optional courses")
+    parser.add_argument("--credits", help="Total credit hours, as a range (e.g. 15-18) or a single value")
+    parser.add_argument(
+        "--file", default="courses.json", help="Path to JSON file (or its indexed .catalog or shard directory)"
+    )
     parser.add_argument("--earliest", help="Earliest start time (e.g. 08:00AM)")
     parser.add_argument("--latest", help="Latest end time (e.g. 05:00PM)")
     parser.add_argument("--mode", help="Modalities: f2f, hybrid, sync, async (comma separated)")
+    parser.add_argument("--top", type=int, help="Only keep (or write) the N best schedules")
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Find schedules best-first with branch-and-bound instead of enumerating all of them",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Enumerate schedules across N processes")
+    parser.add_argument(
+        "--engine",
+        choices=["python", "numpy"],
+        default="python",
+        help="Enumeration engine; numpy checks and scores whole blocks of combinations at once",
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(WRITERS),
+        help="Write ranked schedules to stdout in this format instead of opening the pager",
+    )
+    parser.add_argument(
+        "--objective",
+        help="Rank by weighted objectives instead of campus time, e.g. campus,days=60,early "
+        "(options: campus, days, gaps, early, late, transfers; a bare name weighs 1)",
+    )
+    parser.add_argument(
+        "--pareto",
+        action="store_true",
+        help="Only keep schedules no other schedule beats on every --objective (ranked by their weighted score)",
+    )
+    parser.add_argument(
+        "--count",
+        action="store_true",
+        help="Only print how many conflict-free schedules there are, without building them",
+    )
+    parser.add_argument(
+        "--max-combinations",
+        type=int,
+        default=DEFAULT_MAX_COMBINATIONS,
+        help="Refuse to enumerate more section combinations than this (not checked with --optimize --top)",
+    )
+    parser.add_argument(
+        "--profile",
+        "--stats",
+        nargs="?",
+        const="table",
+        choices=FORMATS,
+        help="On exit, print time per phase, search counters and peak memory to stderr (as a table or json)",
+    )
+    return parser
 
-    args = parser.parse_args()
 
-    # 1. Load Data
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.top is not None and args.top < 1:
+        parser.error("--top must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.optimize and args.workers > 1:
+        parser.error("--optimize runs in a single process; drop --workers")
+    if args.engine == "numpy" and (args.optimize or args.workers > 1):
+        parser.error("--engine numpy cannot be combined with --optimize or --workers")
+    # A course listed both ways is required
+    optional_courses = [c for c in dict.fromkeys(args.optional) if c not in args.courses]
+    if optional_courses and args.choose is None and args.credits is None:
+        parser.error("--optional needs --choose or --credits")
+    if args.choose is not None and not 0 <= args.choose <= len(optional_courses):
+        parser.error(f"--choose must be between 0 and the number of --optional courses ({len(optional_courses)})")
     try:
-        with open(args.file, "r") as f:
-            raw_data = json.load(f)
-    except FileNotFoundError:
-        console.print(f"[bold red]Error:[/bold red] Could not find {args.file}")
-        sys.exit(1)
-
-    # 2. Parse Constraints
+        credit_range = parse_credit_range(args.credits) if args.credits else None
+    except ValueError:
+        parser.error(f"could not read --credits '{args.credits}' (expected e.g. 15-18)")
+    if args.engine == "numpy" and (optional_courses or credit_range):
+        parser.error("--engine numpy cannot be combined with --optional or --credits")
+    try:
+        model = parse_objectives(args.objective) if args.objective else CAMPUS_TIME
+    except ValueError as e:
+        parser.error(f"--objective: {e}")
+    if args.engine == "numpy" and args.objective:
+        parser.error("--engine numpy only ranks by campus time; drop --objective")
+    if args.pareto and (args.optimize or args.workers > 1 or args.engine == "numpy"):
+        parser.error("--pareto runs its own single-process search; drop --optimize, --workers and --engine")
+    headless = args.format is not None
+    profiler = None
+    if args.profile:
+        profiler = Profiler()
+        # Printed however the run ends, including the early exits below
+        atexit.register(profiler.write, sys.stderr, args.profile)
+
+    if args.engine == "numpy" and numpy_engine() is None:
+        report("[yellow]Warning:[/yellow] NumPy is not installed; using the pure-Python engine.", headless)
+
+    # 1. Parse Constraints
     earliest_min = parse_time(args.earliest) if args.earliest else None
     latest_min = parse_time(args.latest) if args.latest else None
 
-    allowed_modes = []
-    if args.mode:
-        for m in args.mode.split(","):
-            if m.lower() in MODALITY_MAP:
-                allowed_modes.append(MODALITY_MAP[m.lower()])
-            else:
-                console.print(f"[yellow]Warning:[/yellow] Unknown mode '{m}'. Options: f2f, hybrid, sync, async")
-
-    # 3. Organize Valid Sections
-    course_buckets = defaultdict(list)
-    unique_courses = list(set(args.courses))
+    allowed_modes, unknown_modes = parse_modes(args.mode) if args.mode else ([], [])
+    for m in unknown_modes:
+        report(f"[yellow]Warning:[/yellow] Unknown mode '{m}'. Options: f2f, hybrid, sync, async", headless)
 
-    # Assign colors to requested courses stably
-    course_color_map = {code: i for i, code in enumerate(unique_courses)}
+    # 2. Load Data (kept unfiltered so constraints can be edited later)
+    # Keep the order courses were given in, so output is the same from run to run
+    unique_courses = list(dict.fromkeys(args.courses)) + optional_courses
+    try:
+        sections_by_course = load_sections(args.file, unique_courses, profiler)
+    except FileNotFoundError:
+        report(f"[bold red]Error:[/bold red] Could not find {args.file}", headless)
+        sys.exit(1)
+    except ValueError as e:
+        report(f"[bold red]Error:[/bold red] {e}", headless)
+        sys.exit(1)
 
-    for entry in raw_data:
-        if entry["course"] in unique_courses:
-            section = CourseSection(entry, course_color_map[entry["course"]])
-            if meets_constraints(section, earliest_min, latest_min, allowed_modes):
-                course_buckets[entry["course"]].append(section)
+    choose = (args.choose, args.choose) if args.choose is not None else None
+    session = ScheduleSession(
+        args,
+        sections_by_course,
+        earliest_min,
+        latest_min,
+        allowed_modes,
+        optional_courses,
+        choose,
+        credit_range,
+        profiler,
+        model,
+    )
 
     # Validation
-    for requested in unique_courses:
-        if not course_buckets[requested]:
-            console.print(
-                f"[bold red]Error:[/bold red] No valid sections found for '{requested}' matching constraints."
+    with timed(profiler, "filter"):
+        empty_courses = session.empty_courses()
+        # Cheap upfront estimate: the size of the full product of the filtered buckets
+        buckets = session.buckets()
+    for requested in empty_courses:
+        report(f"[bold red]Error:[/bold red] No valid sections found for '{requested}' matching constraints.", headless)
+        sys.exit(1)
+
+    combinations = combination_count(buckets, unique_courses, session.optional)
+    if session.space().incompatible:
+        report(f"[bold red]Error:[/bold red] {incompatible_message(*session.space().incompatible)}", headless)
+        sys.exit(1)
+    if args.count:
+        with timed(profiler, "count"):
+            count = session.space().count()
+        print(f"{count} conflict-free schedules out of {combinations} section combinations")
+        return
+    breakdown = " x ".join(str(len(buckets[c]) + (c in session.optional)) for c in unique_courses)
+    if not (args.optimize and args.top is not None):
+        if combinations > args.max_combinations:
+            report(
+                f"[bold red]Error:[/bold red] {breakdown} = {combinations:,} section combinations is over "
+                f"--max-combinations ({args.max_combinations:,}). Use --count to see how many are valid, or "
+                "--optimize --top N to keep only the best.",
+                headless,
+            )
+            sys.exit(1)
+        if combinations > LARGE_SEARCH_WARNING:
+            report(
+                f"[yellow]Warning:[/yellow] {breakdown} = {combinations:,} section combinations to search; "
+                "this may take a while.",
+                headless,
             )
+
+    # 3. Generate Schedules
+    if headless:
+        writer = WRITERS[args.format](sys.stdout, model.names if args.objective else ())
+        try:
+            written = write_schedules(session, writer)
+        except BrokenPipeError:
+            # The reader stopped early (e.g. `| head`); send whatever is still buffered nowhere and exit quietly
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
             sys.exit(1)
+        if not written:
+            report("No valid schedules found that meet all constraints.", headless)
+        return
 
-    sections_lists = [course_buckets[c] for c in unique_courses]
+    # Interactive runs search in the background, so the pager can start early
+    from render import EDIT_HELP, FrameCache, clear_screen, console
 
-    # 4. Generate Schedules
     console.print(f"[yellow]Generating schedules for: {', '.join(unique_courses)}...[/yellow]")
-    valid_schedules = []
-
-    for schedule_tuple in product(*sections_lists):
-        if not has_conflict(schedule_tuple):
-            score = calculate_campus_time(schedule_tuple)
-            valid_schedules.append({"score": score, "sections": schedule_tuple})
+    session.solve()
+    session.collector.wait_for_first()
 
-    if not valid_schedules:
+    if not session.collector.found:
         console.print("[bold red]No valid schedules found that meet all constraints.[/bold red]")
         sys.exit(0)
 
-    # Sort: Lowest score first
-    valid_schedules.sort(key=lambda x: x["score"])
-
-    # 5. Interactive Loop
+    # 4. Interactive Loop
+    # Rankings are re-read on every keypress; while the search is still running
+    # an empty input just refreshes the current view. Equivalent sections are
+    # only expanded into concrete CRN choices for the schedule on screen.
     current_idx = 0
-    total_scheds = len(valid_schedules)
+    ranked_groups = None
+    frames = FrameCache()
+    message = ""
 
     while True:
-        render_schedule(valid_schedules[current_idx], current_idx, total_scheds)
-        user_input = input(">> ").strip().lower()
+        collector = session.collector
+        with timed(profiler, "rank"):
+            snapshot = collector.ranked()
+            if snapshot is not ranked_groups:
+                ranked_groups = snapshot
+                ranked = ExpandedSchedules(ranked_groups, limit=args.top)
+            total_scheds = len(ranked)
+        if total_scheds:
+            current_idx = min(current_idx, total_scheds - 1)
+            with timed(profiler, "render"):
+                frames.show(ranked, current_idx, searching=not collector.done)
+        else:
+            clear_screen()
+            if collector.done:
+                console.print("[bold red]No valid schedules found that meet all constraints.[/bold red]")
+            else:
+                console.print("[yellow]Searching... press Enter to refresh.[/yellow]")
+            console.print(EDIT_HELP)
+        if message:
+            console.print(message)
+            message = ""
+        user_input = input(">> ").strip()
+        command, _, value = user_input.partition(" ")
+        command = command.lower()
+        user_input = user_input.lower()
 
         if user_input == "q":
+            session.cancel()
             break
         elif user_input == "n":
             if current_idx < total_scheds - 1:
@@ -385,6 +745,10 @@ def main():
             idx = int(user_input) - 1
             if 0 <= idx < total_scheds:
                 current_idx = idx
+        elif command in EDIT_COMMANDS:
+            message = apply_edit(session, command, value.strip())
+            current_idx = 0
+            session.collector.wait_for_first()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,94 @@
+import numpy as np
+
+# Sentinels for days a section does not meet on
+NO_START = 1 << 30
+NO_END = -(1 << 30)
+
+# Upper bound on the number of suffix combinations checked in one block
+BLOCK_SIZE = 1 << 16
+
+
+class NumpyEngine:
+    """Enumerates a compiled `SearchSpace` in blocks of candidate combinations.
+
+    Each representative section is stored as per-day start/end arrays and the
+    conflict table as boolean matrices. The leading courses are placed one at
+    a time exactly like `SearchSpace.iter_indices`; every combination of the
+    trailing courses is then conflict-checked and scored in one broadcast
+    operation. Output matches `score_groups(space.iter_groups())`, order included.
+    """
+
+    def __init__(self, space, block_size=BLOCK_SIZE):
+        self.space = space
+        days = sorted({day for depth_spans in space.spans for spans in depth_spans for day in spans})
+        day_index = {day: i for i, day in enumerate(days)}
+
+        self.starts = []
+        self.ends = []
+        for depth_spans in space.spans:
+            starts = np.full((len(depth_spans), len(days)), NO_START, dtype=np.int64)
+            ends = np.full((len(depth_spans), len(days)), NO_END, dtype=np.int64)
+            for a, spans in enumerate(depth_spans):
+                for day, (lo, hi) in spans.items():
+                    starts[a, day_index[day]] = lo
+                    ends[a, day_index[day]] = hi
+            self.starts.append(starts)
+            self.ends.append(ends)
+
+        sizes = [len(domain) for domain in space.domains]
+        self.compatible = [
+            [
+                None
+                if i == j
+                else np.array([[row >> b & 1 for b in range(sizes[j])] for row in space.compatible[i][j]], dtype=bool)
+                for j in range(len(sizes))
+            ]
+            for i in range(len(sizes))
+        ]
+
+        # Place courses one by one up to `split`, then vectorize over the rest
+        self.split = len(sizes)
+        block = 1
+        while self.split > 0 and (self.split == len(sizes) or block * sizes[self.split - 1] <= block_size):
+            self.split -= 1
+            block *= sizes[self.split]
+
+    def _scored_block(self, prefix, candidates):
+        """Conflict-free completions of `prefix` as (class index columns, scores)."""
+        depth_count = len(self.space.domains)
+        indices = [
+            np.array([b for b in range(len(self.space.domains[d])) if candidates[d] >> b & 1], dtype=np.intp)
+            for d in range(self.split, depth_count)
+        ]
+        columns = [grid.ravel() for grid in np.meshgrid(*indices, indexing="ij")]
+
+        keep = np.ones(len(columns[0]), dtype=bool)
+        for x in range(len(columns)):
+            for y in range(x + 1, len(columns)):
+                keep &= self.compatible[self.split + x][self.split + y][columns[x], columns[y]]
+        columns = [column[keep] for column in columns]
+        stats = self.space.stats
+        if stats is not None:
+            # The block's combinations are its candidates; those with a clash are its conflicts
+            stats["candidates"] += len(keep)
+            stats["conflicts"] += len(keep) - len(columns[0])
+
+        starts = [self.starts[d][a] for d, a in enumerate(prefix)]
+        ends = [self.ends[d][a] for d, a in enumerate(prefix)]
+        starts += [self.starts[self.split + x][column] for x, column in enumerate(columns)]
+        ends += [self.ends[self.split + x][column] for x, column in enumerate(columns)]
+        day_start = np.minimum.reduce(np.broadcast_arrays(*starts))
+        day_end = np.maximum.reduce(np.broadcast_arrays(*ends))
+        scores = np.where(day_end >= day_start, day_end - day_start, 0).sum(axis=-1)
+        return columns, scores
+
+    def iter_scored(self):
+        """Yields (score, group) pairs in the same order as the pure-Python search."""
+        space = self.space
+        if not space.domains:
+            yield 0, ()
+            return
+        for prefix in space.iter_indices(stop=self.split):
+            columns, scores = self._scored_block(prefix, space.candidates_after(prefix))
+            for row, score in zip(zip(*(column.tolist() for column in columns)), scores.tolist()):
+                yield score, space.group(prefix + row)
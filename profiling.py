@@ -0,0 +1,120 @@
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+# Peak memory comes from getrusage, which is not available everywhere (e.g. Windows)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+FORMATS = ("table", "json")
+# Per-item timings (e.g. per subject) listed in the table, slowest first
+TABLE_ITEMS = 10
+
+
+def timed(profiler, name):
+    """`profiler.phase(name)`, or nothing when not profiling (`profiler` is None)."""
+    return nullcontext() if profiler is None else profiler.phase(name)
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process and its finished children, in MB, or None if unknown."""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    scale = 1 / 1024 if sys.platform != "darwin" else 1 / (1024 * 1024)
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) * scale, 1)
+
+
+class Profiler:
+    """Wall and CPU time per phase, event counters and peak memory for one run.
+
+    Phases may be timed from several threads at once. `counters` is a plain
+    `Counter`, so hot loops (e.g. `SearchSpace.stats`) can update it directly.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.items = {}
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, name, wall, cpu=None, item=None):
+        """Adds `wall` and `cpu` seconds to phase `name`, also kept per `item` when one is given.
+
+        Phases recorded without `cpu` (e.g. network latency) report no CPU time.
+        """
+        with self._lock:
+            totals = self.phases.setdefault(name, [0.0, None if cpu is None else 0.0, 0])
+            totals[0] += wall
+            if cpu is not None and totals[1] is not None:
+                totals[1] += cpu
+            totals[2] += 1
+            if item is not None:
+                self.items.setdefault(name, {})[item] = wall
+
+    @contextmanager
+    def phase(self, name, item=None):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - wall, time.process_time() - cpu, item)
+
+    def timed_iter(self, name, iterable):
+        """Yields from `iterable`, charging only the time spent producing items to phase `name`."""
+        iterator = iter(iterable)
+        while True:
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.record(name, time.perf_counter() - wall, time.process_time() - cpu)
+            yield item
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def summary(self):
+        return {
+            "phases": {
+                name: {"wall": round(wall, 6), "cpu": None if cpu is None else round(cpu, 6), "calls": calls}
+                for name, (wall, cpu, calls) in self.phases.items()
+            },
+            "counters": dict(self.counters),
+            "peak_memory_mb": peak_memory_mb(),
+            "items": {
+                name: {item: round(wall, 6) for item, wall in items.items()} for name, items in self.items.items()
+            },
+        }
+
+    def format_table(self):
+        summary = self.summary()
+        lines = [f"{'phase':<12} {'wall s':>10} {'cpu s':>10} {'calls':>8}"]
+        for name, totals in summary["phases"].items():
+            cpu = "-" if totals["cpu"] is None else f"{totals['cpu']:.4f}"
+            lines.append(f"{name:<12} {totals['wall']:>10.4f} {cpu:>10} {totals['calls']:>8}")
+        for name, value in summary["counters"].items():
+            lines.append(f"{name:<24} {value:>14,}")
+        if summary["peak_memory_mb"] is not None:
+            lines.append(f"{'peak memory (MB)':<24} {summary['peak_memory_mb']:>14,.1f}")
+        for name, items in summary["items"].items():
+            slowest = sorted(items.items(), key=lambda item: item[1], reverse=True)[:TABLE_ITEMS]
+            lines.append(f"slowest {name}: " + ", ".join(f"{item} {wall:.3f}s" for item, wall in slowest))
+        return "\n".join(lines)
+
+    def write(self, out, fmt="table"):
+        """Writes the report to `out` in one of `FORMATS`."""
+        if fmt == "json":
+            out.write(json.dumps(self.summary(), separators=(",", ":")) + "\n")
+        else:
+            out.write(self.format_table() + "\n")
+        out.flush()
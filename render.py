@@ -0,0 +1,247 @@
+import io
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Try to import rich; exit gracefully if not installed
+try:
+    from rich.console import Console
+    from rich.table import Table
+    from rich import box
+    from rich.panel import Panel
+    from rich.text import Text
+    from rich.align import Align
+except ImportError:
+    print("This tool requires the 'rich' library for visuals.")
+    print("Please run: pip install rich")
+    sys.exit(1)
+
+from solver import calculate_campus_time
+
+# --- Configuration & Constants ---
+
+DAYS_ORDER = [
+    "M",
+    "T",
+    "W",
+    "R",
+    "F",
+]
+DAY_NAMES = {
+    "M": "Mon",
+    "T": "Tue",
+    "W": "Wed",
+    "R": "Thu",
+    "F": "Fri",
+}
+
+# Shown under the controls; the commands themselves are handled by main.py
+EDIT_HELP = (
+    "[bold]Edit:[/bold] [magenta]earliest[/magenta]/[magenta]latest[/magenta] <time|->"
+    " | [magenta]mode[/magenta] <f2f,hybrid,...|->"
+    " | [magenta]add[/magenta]/[magenta]drop[/magenta] <course>"
+)
+
+# Pager frames kept rendered, and the control codes that replace the screen with one
+FRAME_CACHE_SIZE = 16
+CURSOR_HOME_AND_CLEAR = "\033[H\033[J"
+
+# Grid Configuration
+GRID_START_HOUR = 8  # 8 AM
+GRID_END_HOUR = 20  # 8 PM
+GRID_INTERVAL = 15  # Minutes
+START_MINS = GRID_START_HOUR * 60
+END_MINS = GRID_END_HOUR * 60
+TOTAL_SLOTS = (END_MINS - START_MINS) // GRID_INTERVAL
+
+console = Console()
+
+# --- Helper Functions ---
+
+
+def minutes_to_str(minutes):
+    """Converts minutes back to compact '8:15' or '13:45' format."""
+    h = minutes // 60
+    m = minutes % 60
+    # Using 24h format internally for the grid labels looks cleaner
+    return f"{h:02d}:{m:02d}"
+
+
+def clear_screen():
+    # Control codes rather than spawning `clear`/`cls` for every page
+    console.clear()
+
+
+def show_frame(frame):
+    """Replaces the screen with a pre-rendered frame in a single write."""
+    if console.is_terminal:
+        frame = CURSOR_HOME_AND_CLEAR + frame
+    sys.stdout.write(frame)
+    sys.stdout.flush()
+
+
+# --- Visualization (The "Rich" Part) ---
+
+
+def get_slot_index(time_mins):
+    """Maps a minute value to the nearest downward 15-minute grid slot index."""
+    if time_mins < START_MINS:
+        return 0
+    if time_mins >= END_MINS:
+        return TOTAL_SLOTS - 1
+    return (time_mins - START_MINS) // GRID_INTERVAL
+
+
+def render_frame(schedule_obj, index, total, searching=False, width=None):
+    """Renders one pager screen off-screen and returns it as a string."""
+    score, sections = schedule_obj
+
+    # 1. Header
+    # The score is campus time unless --objective weighs other things too
+    campus = calculate_campus_time(sections)
+    hours = campus // 60
+    mins = campus % 60
+    burden = f"Total Campus Burden: {hours}h {mins}m" + (f"  |  Score: {score}" if score != campus else "")
+    header = Panel(
+        Align.center(
+            Text(
+                f"Schedule Option {index + 1} of {total}{'+ (still searching...)' if searching else ''}\n",
+                style="bold white on blue",
+            )
+            + Text(burden, style="italic grey85 on blue")
+        ),
+        box=box.ROUNDED,
+        style="on blue",
+    )
+
+    # 2. Build the 15-Minute Grid System
+
+    # Initialize grid with empty spaces.
+    # grid_data[slot_index][day_index]
+    # Using 6 spaces to ensure the cell has width even when empty
+    empty_cell = Text("      ")
+    grid_data = [[empty_cell for _ in range(5)] for _ in range(TOTAL_SLOTS)]
+
+    arr_courses = []
+
+    # Populate the grid data
+    for section in sections:
+        if section.is_arranged:
+            arr_courses.append(section)
+            continue
+
+        # Create the solid color block text
+        # Using spaces with a background color style
+        color_block = Text("      ", style=section.fill_style)
+
+        for t in section.timings:
+            if t["day"] not in DAYS_ORDER:
+                continue
+
+            day_idx = DAYS_ORDER.index(t["day"])
+
+            # Calculate start and end slots.
+            # End slot: subtracting 1 minute ensures that a class ending at 10:15
+            # does not occupy the 10:15-10:30 slot.
+            start_slot = get_slot_index(t["start"])
+            end_slot = get_slot_index(t["end"] - 1)
+
+            for i in range(start_slot, end_slot + 1):
+                grid_data[i][day_idx] = color_block
+
+    # 3. Construct the Rich Table
+    # Using box.SIMPLE_HEAVY for thicker outer borders, but minimalist inner lines
+    table = Table(box=box.SIMPLE_HEAVY, show_lines=False, header_style="bold", padding=(0, 0))
+    table.add_column("Time", style="dim", width=6, justify="right")
+    for day in DAYS_ORDER:
+        table.add_column(DAY_NAMES[day], justify="center", width=8)
+
+    curr_time = START_MINS
+    for row_idx, row_content in enumerate(grid_data):
+        # Only label hours to reduce noise, or label everything for precision. Let's try labelling everything subtly.
+        time_label = minutes_to_str(curr_time)
+
+        # Add styling to make the hour markers stand out slightly more than 15/30/45 markers
+        if curr_time % 60 == 0:
+            time_label = Text(time_label, style="bold white")
+        else:
+            time_label = Text(time_label, style="dim grey50")
+
+        table.add_row(time_label, *row_content)
+        curr_time += GRID_INTERVAL
+
+    # 4. Legend and Details Panel
+    legend_items = []
+    for s in sections:
+        # Create a small color swatch
+        swatch = Text("  ", style=s.fill_style)
+
+        details = Text(f" {s.course} ({s.crn})", style="bold " + s.color_name)
+        details.append(f" | {s.title}\n", style="dim")
+
+        if s.is_arranged:
+            details.append("   -> Arranged / Online Async\n", style="italic grey70")
+        else:
+            for t in s.timings:
+                details.append(f"   -> {t['day']} {t['str_times']} @ {t['location']}\n", style="grey70")
+
+        legend_items.append(Text.assemble(swatch, details))
+
+    legend_panel = Panel(
+        Align.left(Text("\n").join(legend_items)), title="Course Legend & Details", border_style="blue", box=box.ROUNDED
+    )
+
+    # 5. Render Layout
+    # A private console per frame lets frames be rendered on a background thread
+    out = Console(
+        file=io.StringIO(),
+        width=width or console.width,
+        force_terminal=console.is_terminal,
+        color_system=console.color_system,
+    )
+    out.print(header)
+    out.print(table, justify="center")
+    out.print(legend_panel)
+    controls = "[bold]Controls:[/bold] [green]N[/green] (Next) | [green]P[/green] (Prev) | [yellow]Goto #[/yellow] | [red]Q[/red] (Quit)"
+    if searching:
+        controls += " | [cyan]Enter[/cyan] (Refresh)"
+    out.print(Align.center(controls), style="on grey15")
+    out.print(Align.center(EDIT_HELP), style="on grey15")
+    return out.file.getvalue()
+
+
+class FrameCache:
+    """Pager frames rendered ahead of time and kept in a small LRU.
+
+    Frames belong to one ranking snapshot at one terminal width; when either
+    changes the cache starts over. After a page is shown its neighbours are
+    rendered on a background thread, so N/P usually only has to write a
+    finished string.
+    """
+
+    def __init__(self, size=FRAME_CACHE_SIZE):
+        self.size = size
+        self._frames = OrderedDict()
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._source = None
+
+    def _frame(self, ranked, index, searching, width):
+        if index in self._frames:
+            self._frames.move_to_end(index)
+        else:
+            self._frames[index] = self._pool.submit(render_frame, ranked[index], index, len(ranked), searching, width)
+            while len(self._frames) > self.size:
+                self._frames.popitem(last=False)
+        return self._frames[index]
+
+    def show(self, ranked, index, searching=False):
+        width = console.width
+        source = (ranked, searching, width)
+        # The ranking snapshot is compared by identity; the rest by value
+        if self._source is None or ranked is not self._source[0] or source[1:] != self._source[1:]:
+            self._frames.clear()
+            self._source = source
+        show_frame(self._frame(ranked, index, searching, width).result())
+        for neighbour in (index + 1, index - 1):
+            if 0 <= neighbour < len(ranked):
+                self._frame(ranked, neighbour, searching, width)
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+from typing import List, Optional, Tuple
+
+from catalog import write_atomic
+
+# Cache layout, one directory per term:
+#   subjects.json   - subject list from the last online run
+#   <SUBJECT>.html  - the subject's raw timetable response
+#   <SUBJECT>.json  - {"sha256": hash of the HTML, "version": RECORDS_VERSION, "records": records parsed from it}
+
+# Bump whenever the parser or the section record fields change, so records
+# parsed by older code are parsed again instead of reused
+RECORDS_VERSION = 2
+
+
+def content_hash(html_content: str) -> str:
+    return hashlib.sha256(html_content.encode("utf-8")).hexdigest()
+
+
+class ScrapeCache:
+    """On-disk cache of each subject's timetable HTML and the records parsed from it.
+
+    Parsed records are stored with the hash of the HTML they came from and
+    `RECORDS_VERSION`, so they are only reused while a fresh download is
+    byte-for-byte the same and was parsed by the current code.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def subjects(self) -> Optional[List[Tuple[str, str]]]:
+        """(code, name) pairs saved by the last online run, or None if there are none."""
+        try:
+            with open(self._path("subjects.json"), "r", encoding="utf-8") as f:
+                return [tuple(subject) for subject in json.load(f)]
+        except FileNotFoundError:
+            return None
+
+    def save_subjects(self, subjects: List[Tuple[str, str]]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        write_atomic(self._path("subjects.json"), [json.dumps(subjects)])
+
+    def html(self, subject: str) -> Optional[str]:
+        try:
+            # newline="" keeps the page exactly as downloaded, so its hash still matches
+            with open(self._path(f"{subject}.html"), "r", encoding="utf-8", newline="") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def records(self, subject: str, html_hash: str) -> Optional[List[dict]]:
+        """Records parsed from HTML with hash `html_hash`, or None if that HTML was never parsed by this version."""
+        try:
+            with open(self._path(f"{subject}.json"), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry.get("sha256") != html_hash or entry.get("version") != RECORDS_VERSION:
+            return None
+        return entry["records"]
+
+    def store_html(self, subject: str, html_content: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        write_atomic(self._path(f"{subject}.html"), [html_content])
+
+    def store_records(self, subject: str, html_hash: str, records: List[dict]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {"sha256": html_hash, "version": RECORDS_VERSION, "records": records}
+        write_atomic(self._path(f"{subject}.json"), [json.dumps(entry)])
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from batch import DEFAULT_TOP, BatchSolver, request_key
+from catalog import load_course_entries
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 256
+RELOAD_INTERVAL = 5.0
+# Only term files (course_data_<TERM>.json), not e.g. synthetic benchmark catalogs
+SCRAPED_DATA_GLOB = "course_data_[0-9]*.json"
+
+
+def report(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+class ScheduleService:
+    """Answers schedule queries from a course catalog kept in memory.
+
+    Queries take the same JSON objects as `batch.py` request lines. Loading
+    and solving both run on one worker thread, so the event loop stays free
+    to accept connections and the solver's caches are never shared between
+    threads. Results are kept in an LRU of `cache_size` normalized requests.
+    """
+
+    def __init__(self, path=None, default_top=DEFAULT_TOP, cache_size=DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.default_top = default_top
+        self.cache_size = cache_size
+        self.source = None
+        self.mtime = None
+        self.solver = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def latest_source(self):
+        """The file to serve: `path` if given, else the newest term's scraped JSON in the working directory."""
+        if self.path:
+            return self.path
+        candidates = sorted(glob.glob(SCRAPED_DATA_GLOB))
+        return candidates[-1] if candidates else None
+
+    async def reload_if_changed(self):
+        source = self.latest_source()
+        if source is None:
+            return
+        try:
+            mtime = os.path.getmtime(source)
+        except OSError:
+            return
+        if (source, mtime) == (self.source, self.mtime):
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            entries = await loop.run_in_executor(self._executor, load_course_entries, source)
+        except (OSError, ValueError) as e:
+            # Most likely the scraper is still writing it; try again next poll
+            report(f"Could not load {source}: {e}")
+            return
+        self.solver = BatchSolver(entries, max_results=self.cache_size)
+        self.source, self.mtime = source, mtime
+        report(f"Loaded {len(entries)} sections from {source}")
+
+    async def watch(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await self.reload_if_changed()
+
+    async def route(self, method, target, body):
+        """(HTTP status, JSON payload) for one request."""
+        path = target.split("?", 1)[0]
+        if path == "/status" and method == "GET":
+            return HTTPStatus.OK, {
+                "source": self.source,
+                "courses": len(self.solver.entries_by_course) if self.solver else 0,
+                "cached_results": len(self.solver._results) if self.solver else 0,
+            }
+        if path != "/schedules":
+            return HTTPStatus.NOT_FOUND, {"status": "error", "error": f"no such endpoint '{path}'"}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"status": "error", "error": "use POST with a JSON request body"}
+
+        solver = self.solver
+        if solver is None:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"status": "error", "error": "no course data loaded yet"}
+        try:
+            request = json.loads(body)
+            key = request_key(request, self.default_top)
+        except (ValueError, TypeError, AttributeError) as e:
+            return HTTPStatus.BAD_REQUEST, {"status": "error", "error": str(e)}
+
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, solver.solve, key)
+        except Exception as e:
+            report(f"Failed to solve {key}: {e!r}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"status": "error", "error": "internal error while solving"}
+        record = {"id": request["id"]} if "id" in request else {}
+        record.update(result)
+        return HTTPStatus.OK, record
+
+    async def handle(self, reader, writer):
+        """Serves one HTTP/1.1 request per connection."""
+        try:
+            method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+        except (ValueError, asyncio.IncompleteReadError):
+            status, payload = HTTPStatus.BAD_REQUEST, {"status": "error", "error": "malformed HTTP request"}
+        else:
+            status, payload = await self.route(method, target, body)
+
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1")
+            + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(args):
+    service = ScheduleService(args.file, args.top, args.cache_size)
+    await service.reload_if_changed()
+    if service.solver is None:
+        report(f"Waiting for {args.file or SCRAPED_DATA_GLOB} to appear...")
+
+    if args.socket:
+        server = await asyncio.start_unix_server(service.handle, path=args.socket)
+        report(f"Serving on {args.socket}")
+    else:
+        server = await asyncio.start_server(service.handle, args.host, args.port)
+        report(f"Serving on http://{args.host}:{args.port}")
+
+    watcher = asyncio.create_task(service.watch(args.reload_interval))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve schedule queries from a course catalog kept in memory")
+    parser.add_argument(
+        "--file",
+        help=f"Path to JSON file (or its indexed .catalog). Default: newest {SCRAPED_DATA_GLOB} in this directory",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--socket", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="Schedules per query unless it sets 'top'")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="Number of query results to keep")
+    parser.add_argument(
+        "--reload-interval", type=float, default=RELOAD_INTERVAL, help="Seconds between checks for new course data"
+    )
+    args = parser.parse_args()
+    if args.top < 1:
+        parser.error("--top must be at least 1")
+    if args.cache_size < 1:
+        parser.error("--cache-size must be at least 1")
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
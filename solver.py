@@ -0,0 +1,1208 @@
+import heapq
+import math
+import multiprocessing
+import threading
+from array import array
+from bisect import bisect_right
+from collections import Counter, defaultdict, deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from itertools import accumulate, repeat
+
+# --- Logic: Conflicts & Scoring ---
+
+
+def has_conflict(schedule):
+    day_map = defaultdict(list)
+    for section in schedule:
+        for t in section.timings:
+            day_map[t["day"]].append((t["start"], t["end"]))
+
+    for day, slots in day_map.items():
+        slots.sort(key=lambda x: x[0])
+        for i in range(len(slots) - 1):
+            # If current ends after next starts -> Conflict
+            if slots[i][1] > slots[i + 1][0]:
+                return True
+    return False
+
+
+def calculate_campus_time(schedule):
+    day_stats = {}
+    for section in schedule:
+        for t in section.timings:
+            day = t["day"]
+            if day not in day_stats:
+                day_stats[day] = {"min": float("inf"), "max": float("-inf")}
+            day_stats[day]["min"] = min(day_stats[day]["min"], t["start"])
+            day_stats[day]["max"] = max(day_stats[day]["max"], t["end"])
+
+    total_minutes = 0
+    for day in day_stats:
+        total_minutes += day_stats[day]["max"] - day_stats[day]["min"]
+    return total_minutes
+
+
+# --- Occupancy Masks ---
+
+# One bit per minute of the week; each day gets its own 1440-bit block so two
+# sections overlap exactly when their masks share a bit.
+MINUTES_PER_DAY = 24 * 60
+DAY_SLOTS = {day: i for i, day in enumerate("MTWRFSU")}
+
+
+def occupancy_mask(timings):
+    """Compiles a section's meetings into a single week-long occupancy bitmask."""
+    mask = 0
+    for t in timings:
+        offset = DAY_SLOTS.setdefault(t["day"], len(DAY_SLOTS)) * MINUTES_PER_DAY
+        if t["end"] > t["start"]:
+            mask |= ((1 << (t["end"] - t["start"])) - 1) << (offset + t["start"])
+    return mask
+
+
+def iter_bits(bits):
+    """Yields the positions of the set bits in `bits`, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def build_conflict_table(domains, cache=None):
+    """Pairwise compatibility between the sections of every two courses.
+
+    `table[i][j][a]` is a bitset over `domains[j]` with bit `b` set when
+    section `a` of course `i` and section `b` of course `j` do not overlap.
+    Rows can be shared across searches through `cache`, keyed by the identity
+    of the sections involved, so the cached sections must outlive it.
+    """
+    table = [[None] * len(domains) for _ in domains]
+    for i, domain in enumerate(domains):
+        for j, other in enumerate(domains):
+            if i == j:
+                continue
+            rows = None
+            if cache is not None:
+                key = (tuple(map(id, domain)), tuple(map(id, other)))
+                rows = cache.get(key)
+            if rows is None:
+                rows = [
+                    sum(1 << b for b, candidate in enumerate(other) if not section.mask & candidate.mask)
+                    for section in domain
+                ]
+                if cache is not None:
+                    cache[key] = rows
+            table[i][j] = rows
+    return table
+
+
+def count_removed(before, after, start, stop):
+    """Candidates set in bitsets `before[start:stop]` but cleared in `after[start:stop]`."""
+    return sum(bin(before[j] & ~after[j]).count("1") for j in range(start, stop))
+
+
+def arc_consistency(compatible, sizes):
+    """Drops sections that have no compatible partner in some other course.
+
+    Removing a section can leave sections of other courses without partners,
+    so affected course pairs are rechecked until nothing changes (AC-3).
+    Returns (supported, wiped): `supported[i]` is a bitset over the sections
+    of course `i` that remain, and `wiped` is the pair (i, j) whose check
+    left course `i` with nothing, or None.
+    """
+    supported = [(1 << size) - 1 for size in sizes]
+    if not all(supported):
+        return supported, None
+    pending = deque((i, j) for i in range(len(sizes)) for j in range(len(sizes)) if i != j)
+    queued = set(pending)
+    while pending:
+        i, j = pending.popleft()
+        queued.discard((i, j))
+        rows = compatible[i][j]
+        keep = 0
+        for a in iter_bits(supported[i]):
+            if rows[a] & supported[j]:
+                keep |= 1 << a
+        if keep == supported[i]:
+            continue
+        supported[i] = keep
+        if not keep:
+            return supported, (i, j)
+        for k in range(len(sizes)):
+            if k != i and k != j and (k, i) not in queued:
+                pending.append((k, i))
+                queued.add((k, i))
+    return supported, None
+
+
+def day_spans(timings):
+    """Earliest start and latest end per day, as {day: (start, end)}."""
+    spans = {}
+    for t in timings:
+        lo, hi = spans.get(t["day"], (t["start"], t["end"]))
+        spans[t["day"]] = (min(lo, t["start"]), max(hi, t["end"]))
+    return spans
+
+
+def span_increase(spans, section_spans):
+    """Minutes of campus time that adding `section_spans` to `spans` would cost."""
+    added = 0
+    for day, (lo, hi) in section_spans.items():
+        current = spans.get(day)
+        if current is None:
+            added += hi - lo
+        else:
+            added += max(hi, current[1]) - min(lo, current[0]) - (current[1] - current[0])
+    return added
+
+
+def extend_spans(spans, section_spans):
+    """Returns `spans` widened to cover `section_spans` (the input is left untouched)."""
+    merged = dict(spans)
+    for day, (lo, hi) in section_spans.items():
+        current = merged.get(day)
+        merged[day] = (lo, hi) if current is None else (min(lo, current[0]), max(hi, current[1]))
+    return merged
+
+
+# --- Objectives ---
+
+# What schedules can be ranked by, all "lower is better":
+#   campus    - minutes from first to last class, summed over days (the default ranking)
+#   days      - days with at least one class
+#   gaps      - idle minutes between classes on those days
+#   early     - campus minutes before EARLY_START (first class start to 10:00), per day
+#   late      - campus minutes after LATE_END (16:00 to last class end), per day
+#   transfers - meetings starting within TRANSFER_MINUTES of another one ending, in a different building
+OBJECTIVES = ("campus", "days", "gaps", "early", "late", "transfers")
+# Adding a section never lowers these, so a partial schedule's value bounds all of its completions
+MONOTONE_OBJECTIVES = frozenset({"campus", "days", "early", "late", "transfers"})
+EARLY_START = 10 * 60
+LATE_END = 16 * 60
+TRANSFER_MINUTES = 15
+# Keeps weighted scores well inside the 64-bit integers results are stored as
+MAX_WEIGHT = 10**6
+
+
+def building(location):
+    """The building of a location such as 'MCB 100', or None when it has no room to walk to."""
+    name = (location or "").split(" ", 1)[0].upper()
+    return None if name in ("", "ONLINE", "TBA", "ARR", "(ARR)") else name
+
+
+def count_transfers(meetings, added):
+    """Tight transfers between meetings in `added` and `meetings`, both {day: ((start, end, building), ...)}."""
+    transfers = 0
+    for day, new in added.items():
+        for start, end, place in new:
+            for other_start, other_end, other_place in meetings.get(day, ()):
+                if place != other_place and (
+                    0 <= start - other_end <= TRANSFER_MINUTES or 0 <= other_start - end <= TRANSFER_MINUTES
+                ):
+                    transfers += 1
+    return transfers
+
+
+def _campus_increase(state, data):
+    return span_increase(state[0], data[0])
+
+
+class ScoreModel:
+    """Weighted sum of `OBJECTIVES`, evaluated incrementally as a search adds sections.
+
+    A search state is (day spans, busy minutes, meetings by day, transfers),
+    starting from `start`; `compile` turns a section into what `extend` adds
+    to it. `lower` counts only `MONOTONE_OBJECTIVES`, so it never exceeds the
+    score of any schedule that extends the state, which is what best-first
+    search and Pareto pruning rely on. Weights are integers from 0 to
+    `MAX_WEIGHT`.
+    """
+
+    start = ({}, 0, {}, 0)
+
+    def __init__(self, weights):
+        unknown = set(weights) - set(OBJECTIVES)
+        if unknown:
+            raise ValueError(f"unknown objective '{sorted(unknown)[0]}'. Options: {', '.join(OBJECTIVES)}")
+        if any(not isinstance(weight, int) or not 0 <= weight <= MAX_WEIGHT for weight in weights.values()):
+            raise ValueError(f"objective weights must be integers from 0 to {MAX_WEIGHT:,}")
+        self.names = tuple(name for name in OBJECTIVES if name in weights)
+        self.weights = {name: weights[name] for name in self.names}
+        self.uses_locations = "transfers" in self.weights
+        self.monotone = all(name in MONOTONE_OBJECTIVES for name in self.names)
+        self.campus_only = self.weights == {"campus": 1}
+        if self.campus_only:
+            # Plain campus time, the default ranking: no state beyond the spans is needed
+            self.lower_increase = _campus_increase
+
+    def compile(self, section):
+        spans = day_spans(section.timings)
+        busy = sum(t["end"] - t["start"] for t in section.timings)
+        meetings = {}
+        if self.uses_locations:
+            for t in section.timings:
+                meetings.setdefault(t["day"], []).append((t["start"], t["end"], building(t["location"])))
+            meetings = {day: tuple(m for m in day_meetings if m[2]) for day, day_meetings in meetings.items()}
+        # A section's own meetings can be back to back, too (each pair is counted from both sides)
+        return spans, busy, meetings, count_transfers(meetings, meetings) // 2
+
+    def extend(self, state, data):
+        spans, busy, meetings, transfers = state
+        section_spans, section_busy, section_meetings, section_transfers = data
+        if section_meetings:
+            transfers += section_transfers + count_transfers(meetings, section_meetings)
+            meetings = dict(meetings)
+            for day, added in section_meetings.items():
+                meetings[day] = meetings.get(day, ()) + added
+        return extend_spans(spans, section_spans), busy + section_busy, meetings, transfers
+
+    def values(self, state):
+        """{objective: value} for every objective, weighted or not."""
+        spans, busy, _, transfers = state
+        campus = sum(hi - lo for lo, hi in spans.values())
+        return {
+            "campus": campus,
+            "days": len(spans),
+            "gaps": campus - busy,
+            "early": sum(max(0, EARLY_START - lo) for lo, _ in spans.values()),
+            "late": sum(max(0, hi - LATE_END) for _, hi in spans.values()),
+            "transfers": transfers,
+        }
+
+    def vector(self, state):
+        """Values of the weighted objectives, in `names` order."""
+        values = self.values(state)
+        return tuple(values[name] for name in self.names)
+
+    def lower_vector(self, state):
+        """`vector`, with the objectives that can still drop bounded by 0."""
+        values = self.values(state)
+        return tuple(values[name] if name in MONOTONE_OBJECTIVES else 0 for name in self.names)
+
+    def score(self, state):
+        values = self.values(state)
+        return sum(weight * values[name] for name, weight in self.weights.items())
+
+    def lower(self, state):
+        values = self.values(state)
+        return sum(weight * values[name] for name, weight in self.weights.items() if name in MONOTONE_OBJECTIVES)
+
+    def lower_increase(self, state, data):
+        return self.lower(self.extend(state, data)) - self.lower(state)
+
+    def state_of(self, sections):
+        state = self.start
+        for section in sections:
+            state = self.extend(state, self.compile(section))
+        return state
+
+    def evaluate(self, sections):
+        """Score of a complete schedule."""
+        if self.campus_only:
+            return calculate_campus_time(sections)
+        return self.score(self.state_of(sections))
+
+
+CAMPUS_TIME = ScoreModel({"campus": 1})
+
+
+def parse_objectives(text):
+    """Weights from e.g. 'campus,days=60,early=2' (a bare name weighs 1). Raises ValueError."""
+    weights = {}
+    for item in text.split(","):
+        name, _, weight = item.strip().partition("=")
+        if not name:
+            continue
+        try:
+            weights[name.lower()] = int(weight) if weight else 1
+        except ValueError:
+            raise ValueError(f"weight of '{name}' must be an integer") from None
+    if not weights:
+        raise ValueError("no objectives given")
+    return ScoreModel(weights)
+
+
+def dominates(a, b):
+    """Whether objective vector `a` is at least as good as `b` everywhere and better somewhere."""
+    return a != b and all(x <= y for x, y in zip(a, b))
+
+
+# --- Equivalence Classes ---
+
+
+def timing_signature(section, by_location=False):
+    """The days and times a section meets, ignoring CRN, instructor and (unless `by_location`) location."""
+    if by_location:
+        return tuple(sorted((t["day"], t["start"], t["end"], building(t["location"]) or "") for t in section.timings))
+    return tuple(sorted((t["day"], t["start"], t["end"]) for t in section.timings))
+
+
+def group_equivalent_sections(sections, by_location=False, by_credits=False):
+    """Groups sections that meet at exactly the same times, in first-seen order.
+
+    With `by_location`, sections must also meet in the same buildings, and
+    with `by_credits` they must also be worth the same credit hours.
+    """
+    groups = {}
+    for section in sections:
+        key = timing_signature(section, by_location)
+        if by_credits:
+            key = (key, section.credits)
+        groups.setdefault(key, []).append(section)
+    return [tuple(members) for members in groups.values()]
+
+
+def group_size(group):
+    """Number of concrete schedules a group of equivalence classes stands for."""
+    size = 1
+    for members in group:
+        size *= len(members)
+    return size
+
+
+def expand_group(group, k):
+    """The `k`-th concrete schedule of `group`, in `product(*group)` order."""
+    picks = []
+    for members in reversed(group):
+        k, r = divmod(k, len(members))
+        picks.append(members[r])
+    return tuple(reversed(picks))
+
+
+# --- Search ---
+
+
+class _Skipped:
+    """Representative of the empty class that stands for leaving an optional course out."""
+
+    mask = 0
+    timings = ()
+    credits = 0
+
+    def __reduce__(self):
+        # Unpickles (e.g. in worker processes) as the module's one instance
+        return "SKIPPED"
+
+
+SKIPPED = _Skipped()
+
+
+def combination_count(course_buckets, courses, optional=()):
+    """Size of the full cross product of the course buckets: a cheap upper bound on the schedules to search.
+
+    Leaving an optional course out counts as one more choice for it.
+    """
+    return math.prod(len(course_buckets[course]) + (course in optional) for course in courses)
+
+
+def constraint_order(course_buckets, courses):
+    """Positions in `courses`, most-constrained (fewest sections) first."""
+    return sorted(range(len(courses)), key=lambda i: len(course_buckets[courses[i]]))
+
+
+class SearchSpace:
+    """The sections of the requested courses, compiled for search.
+
+    Sections of a course that meet at identical times are interchangeable, so
+    the search runs over equivalence classes of them. Courses are held in
+    most-constrained-first order; `classes[d]` lists the usable classes of the
+    course placed at depth `d`, `domains[d]` one representative section per
+    class, and `order[d]` is that course's position in `courses`.
+
+    Classes that conflict with every class of some other course are pruned
+    before the search (see `arc_consistency`). If that empties a course,
+    `incompatible` names it and the course that ruled it out.
+
+    Courses in `optional` may be left out: each gets one more, empty class
+    (represented by `SKIPPED`) that fits with everything, and is omitted from
+    the schedules that pick it. `choose` bounds how many optional courses a
+    schedule takes and `credits` its total credit hours, both as inclusive
+    (low, high) pairs; partial schedules that can no longer land inside them
+    are pruned during the search.
+
+    Schedules are scored by `model` (a `ScoreModel`, campus time by
+    default); when it looks at locations, sections in different buildings
+    are kept in different classes.
+
+    Set `stats` to a `Counter` to have searches count the sections they try
+    ("candidates"), the later courses' candidates each placed section rules
+    out by clashing with them ("conflicts"), and sections cut by
+    course-selection limits or score bounds ("pruned").
+    """
+
+    def __init__(
+        self, course_buckets, courses, table_cache=None, optional=(), choose=None, credits=None, model=CAMPUS_TIME
+    ):
+        self.courses = list(courses)
+        self.model = model
+        self.stats = None
+        optional = set(optional)
+        # A section whose own meetings overlap can never be part of a valid schedule
+        classes = {
+            course: [
+                members
+                for members in group_equivalent_sections(
+                    course_buckets[course], model.uses_locations, by_credits=credits is not None
+                )
+                if not has_conflict(members[:1])
+            ]
+            + ([()] if course in optional else [])
+            for course in self.courses
+        }
+
+        self.incompatible = None
+        representatives = [
+            [members[0] if members else SKIPPED for members in classes[course]] for course in self.courses
+        ]
+        supported, wiped = arc_consistency(
+            build_conflict_table(representatives, table_cache), list(map(len, representatives))
+        )
+        for course, bits in zip(self.courses, supported):
+            classes[course] = [classes[course][a] for a in iter_bits(bits)]
+        if wiped is not None:
+            self.incompatible = (self.courses[wiped[0]], self.courses[wiped[1]])
+
+        self.order = constraint_order(classes, self.courses)
+        self.classes = [classes[self.courses[pos]] for pos in self.order]
+        self.domains = [
+            [members[0] if members else SKIPPED for members in course_classes] for course_classes in self.classes
+        ]
+        self.compatible = build_conflict_table(self.domains, table_cache)
+        self.spans = [[day_spans(s.timings) for s in domain] for domain in self.domains]
+        self.scoring = [[model.compile(s) for s in domain] for domain in self.domains]
+
+        # Course-selection limits, checked only when there is something to check
+        self.limited = bool(optional) or choose is not None or credits is not None
+        self.choose = choose or (0, len(optional))
+        self.credit_range = credits or (-math.inf, math.inf)
+        self.taken = [
+            [1 if members and self.courses[pos] in optional else 0 for members in course_classes]
+            for pos, course_classes in zip(self.order, self.classes)
+        ]
+        self.credits = [[s.credits for s in domain] for domain in self.domains]
+        # Most optional courses, and least/most credit hours, the courses from depth `d` on can still add
+        self.more_taken = list(accumulate((max(taken, default=0) for taken in reversed(self.taken)), initial=0))[::-1]
+        self.min_more_credits = list(accumulate((min(c, default=0) for c in reversed(self.credits)), initial=0))[::-1]
+        self.max_more_credits = list(accumulate((max(c, default=0) for c in reversed(self.credits)), initial=0))[::-1]
+
+    def selection_state(self, chosen):
+        """(optional courses taken, credit hours) of a partial schedule."""
+        taken = sum(self.taken[depth][a] for depth, a in enumerate(chosen))
+        credits = sum(self.credits[depth][a] for depth, a in enumerate(chosen))
+        return taken, credits
+
+    def can_complete(self, depth, state):
+        """Whether a partial schedule of `depth` courses with `state` can still meet `choose` and `credits`."""
+        taken, credits = state
+        low, high = self.choose
+        if taken > high or taken + self.more_taken[depth] < low:
+            return False
+        low, high = self.credit_range
+        return credits + self.min_more_credits[depth] <= high and credits + self.max_more_credits[depth] >= low
+
+    def sections(self, chosen):
+        """Maps class indices in search order to representative sections in `courses` order.
+
+        Optional courses left out of the schedule are omitted.
+        """
+        schedule = [None] * len(chosen)
+        for depth, pos in enumerate(self.order):
+            schedule[pos] = self.domains[depth][chosen[depth]]
+        return tuple(s for s in schedule if s is not SKIPPED)
+
+    def group(self, chosen):
+        """Maps class indices in search order to each course's class members, in `courses` order.
+
+        Optional courses left out of the schedule are omitted.
+        """
+        group = [None] * len(chosen)
+        for depth, pos in enumerate(self.order):
+            group[pos] = self.classes[depth][chosen[depth]]
+        return tuple(members for members in group if members)
+
+    def candidates_after(self, prefix):
+        """Candidate bitsets per depth once `prefix` is placed, or None if it is infeasible."""
+        candidates = [(1 << len(domain)) - 1 for domain in self.domains]
+        for depth, a in enumerate(prefix):
+            if not candidates[depth] >> a & 1:
+                return None
+            rows = self.compatible[depth]
+            for j in range(depth + 1, len(self.domains)):
+                candidates[j] &= rows[j][a]
+                if not candidates[j]:
+                    return None
+        return candidates
+
+    def iter_indices(self, prefix=(), stop=None):
+        """Yields every conflict-free schedule as class indices in search order.
+
+        Placing a section intersects each later course's candidate bitset with
+        that section's row of the conflict table, so a branch is dropped as soon
+        as any remaining course has nothing left that fits. The search can be
+        limited to schedules starting with `prefix`, and with `stop` it yields
+        the feasible partial schedules of that many courses instead.
+        """
+        depth_count = len(self.domains)
+        stop = depth_count if stop is None else stop
+        candidates = self.candidates_after(prefix)
+        if candidates is None:
+            return
+        limited = self.limited
+        stats = self.stats
+        state = self.selection_state(prefix)
+        if limited and not self.can_complete(len(prefix), state):
+            return
+        if len(prefix) == stop:
+            yield tuple(prefix)
+            return
+        chosen = list(prefix) + [0] * (stop - len(prefix))
+
+        def place(depth, candidates, state):
+            taken, credits = self.taken[depth], self.credits[depth]
+            if stats is not None:
+                stats["candidates"] += bin(candidates[depth]).count("1")
+            if depth == depth_count - 1:
+                # Every candidate left for the last course completes a schedule
+                for a in iter_bits(candidates[depth]):
+                    if limited and not self.can_complete(depth_count, (state[0] + taken[a], state[1] + credits[a])):
+                        if stats is not None:
+                            stats["pruned"] += 1
+                        continue
+                    chosen[depth] = a
+                    yield tuple(chosen)
+                return
+            rows = self.compatible[depth]
+            for a in iter_bits(candidates[depth]):
+                if limited:
+                    next_state = (state[0] + taken[a], state[1] + credits[a])
+                    if not self.can_complete(depth + 1, next_state):
+                        if stats is not None:
+                            stats["pruned"] += 1
+                        continue
+                else:
+                    next_state = state
+                narrowed = candidates[:]
+                for j in range(depth + 1, depth_count):
+                    narrowed[j] &= rows[j][a]
+                    if not narrowed[j]:
+                        if stats is not None:
+                            stats["conflicts"] += count_removed(candidates, narrowed, depth + 1, j + 1)
+                        break
+                else:
+                    if stats is not None:
+                        stats["conflicts"] += count_removed(candidates, narrowed, depth + 1, depth_count)
+                    chosen[depth] = a
+                    if depth + 1 == stop:
+                        yield tuple(chosen)
+                    else:
+                        yield from place(depth + 1, narrowed, next_state)
+
+        yield from place(len(prefix), candidates, state)
+
+    def count(self):
+        """Number of conflict-free schedules, counted without building any of them.
+
+        How many ways the unplaced courses can be completed depends only on
+        their candidate bitsets (and the course-selection state), so completion
+        counts are memoized on those and shared by every prefix that leaves
+        the same candidates behind.
+        """
+        depth_count = len(self.domains)
+        candidates = self.candidates_after(())
+        if candidates is None or not self.can_complete(0, (0, 0)):
+            return 0
+        if not depth_count:
+            return 1
+        # Leaving an optional course out is one way to fill its place
+        sizes = [[len(members) or 1 for members in course_classes] for course_classes in self.classes]
+        memo = {}
+
+        limited = self.limited
+
+        def completions(depth, candidates, state):
+            taken, credits = self.taken[depth], self.credits[depth]
+            if depth == depth_count - 1:
+                if not limited:
+                    return sum(sizes[depth][a] for a in iter_bits(candidates[depth]))
+                return sum(
+                    sizes[depth][a]
+                    for a in iter_bits(candidates[depth])
+                    if self.can_complete(depth_count, (state[0] + taken[a], state[1] + credits[a]))
+                )
+            # Without selection limits the state stays (0, 0), so it never splits the memo
+            key = (depth, tuple(candidates[depth:]), state)
+            if key in memo:
+                return memo[key]
+            rows = self.compatible[depth]
+            total = 0
+            for a in iter_bits(candidates[depth]):
+                if limited:
+                    next_state = (state[0] + taken[a], state[1] + credits[a])
+                    if not self.can_complete(depth + 1, next_state):
+                        continue
+                else:
+                    next_state = state
+                narrowed = candidates[:]
+                for j in range(depth + 1, depth_count):
+                    narrowed[j] &= rows[j][a]
+                    if not narrowed[j]:
+                        break
+                else:
+                    total += sizes[depth][a] * completions(depth + 1, narrowed, next_state)
+            memo[key] = total
+            return total
+
+        return completions(0, candidates, (0, 0))
+
+    def iter_groups(self):
+        for chosen in self.iter_indices():
+            yield self.group(chosen)
+
+    def _remaining_increase(self, depth, state, candidates):
+        """Admissible estimate of the score the unplaced courses must still add.
+
+        Every completion uses some candidate of each remaining course, and the
+        model's lower bound never shrinks as sections are added, so the largest
+        of the cheapest per-course increases can never overestimate.
+        """
+        increase = self.model.lower_increase
+        bound = 0
+        for j in range(depth, len(self.domains)):
+            cheapest = min(increase(state, self.scoring[j][a]) for a in iter_bits(candidates[j]))
+            bound = max(bound, cheapest)
+        return bound
+
+    def iter_best(self, limit=None):
+        """Yields (score, chosen) for conflict-free schedules, lowest score first.
+
+        Best-first branch and bound: partial schedules are expanded in order of
+        their lower bound, so a complete schedule is only produced once nothing
+        left in the frontier could beat it. With a `limit`, partial schedules
+        whose bound is already worse than the `limit`-th best complete schedule
+        seen so far are never queued, and the search stops after `limit` results.
+        Ties come out in the same order `iter_indices` finds them.
+        """
+        depth_count = len(self.domains)
+        stats = self.stats
+        model = self.model
+        increase = model.lower_increase
+        # Scores of the best complete schedules generated so far (negated max-heap)
+        kept = []
+        # Frontier entries: (bound, complete, chosen, scoring state, lower bound of its score,
+        # candidates, selection state); complete entries are keyed by their exact score
+        root_candidates = [(1 << len(domain)) - 1 for domain in self.domains]
+        if not all(root_candidates) or not self.can_complete(0, (0, 0)):
+            return
+        if depth_count:
+            root_bound = self._remaining_increase(0, model.start, root_candidates)
+            frontier = [(root_bound, 0, (), model.start, 0, root_candidates, (0, 0))]
+        else:
+            frontier = [(0, 1, (), model.start, 0, root_candidates, (0, 0))]
+        emitted = 0
+
+        while frontier:
+            bound, complete, chosen, scored, lower, candidates, state = heapq.heappop(frontier)
+            if complete:
+                yield bound, chosen
+                emitted += 1
+                if limit is not None and emitted == limit:
+                    return
+                continue
+
+            depth = len(chosen)
+            rows = self.compatible[depth]
+            taken, credits = self.taken[depth], self.credits[depth]
+            if stats is not None:
+                stats["candidates"] += bin(candidates[depth]).count("1")
+            for a in iter_bits(candidates[depth]):
+                child_state = (state[0] + taken[a], state[1] + credits[a])
+                if not self.can_complete(depth + 1, child_state):
+                    if stats is not None:
+                        stats["pruned"] += 1
+                    continue
+                narrowed = candidates[:]
+                for j in range(depth + 1, depth_count):
+                    narrowed[j] &= rows[j][a]
+                    if not narrowed[j]:
+                        if stats is not None:
+                            stats["conflicts"] += count_removed(candidates, narrowed, depth + 1, j + 1)
+                        break
+                else:
+                    if stats is not None:
+                        stats["conflicts"] += count_removed(candidates, narrowed, depth + 1, depth_count)
+                    data = self.scoring[depth][a]
+                    child_lower = lower + increase(scored, data)
+                    child_scored = model.extend(scored, data)
+                    if depth + 1 == depth_count:
+                        child_score = child_lower if model.monotone else model.score(child_scored)
+                        child = (child_score, 1)
+                        if limit is not None:
+                            if len(kept) < limit:
+                                heapq.heappush(kept, -child_score)
+                            elif child_score < -kept[0]:
+                                heapq.heapreplace(kept, -child_score)
+                    else:
+                        estimate = child_lower + self._remaining_increase(depth + 1, child_scored, narrowed)
+                        child = (max(bound, estimate), 0)
+                    if limit is not None and len(kept) == limit and child[0] > -kept[0]:
+                        if stats is not None:
+                            stats["pruned"] += 1
+                        continue
+                    heapq.heappush(frontier, child + (chosen + (a,), child_scored, child_lower, narrowed, child_state))
+
+    def iter_best_groups(self, limit=None):
+        for _, chosen in self.iter_best(limit):
+            yield self.group(chosen)
+
+    def pareto_front(self):
+        """(score, chosen) for every schedule that no other beats on all of the model's objectives.
+
+        Depth-first like `iter_indices`, carrying each partial schedule's
+        scoring state: a branch is dropped once its objectives' lower bounds
+        are already dominated by a schedule on the front. Schedules with equal
+        objective values are all kept. Results come in search order.
+        """
+        depth_count = len(self.domains)
+        model = self.model
+        stats = self.stats
+        candidates = self.candidates_after(())
+        if candidates is None or not self.can_complete(0, (0, 0)):
+            return []
+        # Entries: (objective vector, score, chosen)
+        front = []
+        chosen = [0] * depth_count
+
+        def beaten(vector):
+            return any(dominates(other, vector) for other, _, _ in front)
+
+        def place(depth, candidates, scored, state):
+            if depth == depth_count:
+                vector = model.vector(scored)
+                if not beaten(vector):
+                    front[:] = [entry for entry in front if not dominates(vector, entry[0])]
+                    front.append((vector, model.score(scored), tuple(chosen)))
+                return
+            if stats is not None:
+                stats["candidates"] += bin(candidates[depth]).count("1")
+            rows = self.compatible[depth]
+            taken, credits = self.taken[depth], self.credits[depth]
+            for a in iter_bits(candidates[depth]):
+                next_state = (state[0] + taken[a], state[1] + credits[a])
+                if not self.can_complete(depth + 1, next_state):
+                    if stats is not None:
+                        stats["pruned"] += 1
+                    continue
+                narrowed = candidates[:]
+                for j in range(depth + 1, depth_count):
+                    narrowed[j] &= rows[j][a]
+                    if not narrowed[j]:
+                        if stats is not None:
+                            stats["conflicts"] += count_removed(candidates, narrowed, depth + 1, j + 1)
+                        break
+                else:
+                    if stats is not None:
+                        stats["conflicts"] += count_removed(candidates, narrowed, depth + 1, depth_count)
+                    child_scored = model.extend(scored, self.scoring[depth][a])
+                    if depth + 1 < depth_count and beaten(model.lower_vector(child_scored)):
+                        if stats is not None:
+                            stats["pruned"] += 1
+                        continue
+                    chosen[depth] = a
+                    place(depth + 1, narrowed, child_scored, next_state)
+
+        place(0, candidates, model.start, (0, 0))
+        return [(score, chosen) for _, score, chosen in front]
+
+
+# --- Results ---
+
+
+def score_groups(groups, model=CAMPUS_TIME):
+    """Pairs each group with its score (every member of a class meets at the same times and places)."""
+    evaluate = calculate_campus_time if model.campus_only else model.evaluate
+    for group in groups:
+        yield evaluate([members[0] for members in group]), group
+
+
+# Counting sorts are used while the score range is at most this many times the number of results
+COUNTING_SORT_SPREAD = 4
+
+
+class ResultStore:
+    """Append-only, array-backed sequence of (score, group) pairs.
+
+    Each distinct equivalence class is stored once; a group is kept as one
+    small index into that table per course, next to its score in a parallel
+    array. Pairs are rebuilt only when they are read.
+    """
+
+    def __init__(self):
+        self.scores = array("q")
+        self._offsets = array("Q", [0])
+        self._members = array("H")
+        self._classes = []
+        self._class_index = {}
+
+    def append(self, score, group):
+        for members in group:
+            index = self._class_index.get(members)
+            if index is None:
+                index = self._class_index[members] = len(self._classes)
+                self._classes.append(members)
+                if index == 0x10000:
+                    self._members = array("I", self._members)
+            self._members.append(index)
+        self.scores.append(score)
+        self._offsets.append(len(self._members))
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __getitem__(self, index):
+        classes = self._classes
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self.scores[index], tuple(classes[k] for k in self._members[start:end])
+
+
+def rank_order(scores):
+    """Positions of `scores` from lowest to highest score, ties in position order.
+
+    Campus minutes span a small range, so a counting sort builds the order
+    straight into an array without a temporary list per result. Heavily
+    weighted objectives can spread scores much wider than there are results;
+    those are ranked with a (stable) comparison sort instead.
+    """
+    order = array("I", bytes(4 * len(scores)))
+    if not scores:
+        return order
+    low = min(scores)
+    span = max(scores) - low + 1
+    if span > COUNTING_SORT_SPREAD * len(scores):
+        order[:] = array("I", sorted(range(len(scores)), key=scores.__getitem__))
+        return order
+    counts = [0] * span
+    for score in scores:
+        counts[score - low] += 1
+    starts = list(accumulate(counts, initial=0))
+    for position, score in enumerate(scores):
+        order[starts[score - low]] = position
+        starts[score - low] += 1
+    return order
+
+
+class RankedResults:
+    """A `ResultStore` read in rank order: `order[i]` is the position of the i-th best."""
+
+    def __init__(self, store, order):
+        self._store = store
+        self._order = order
+
+    def __len__(self):
+        return len(self._order)
+
+    def __getitem__(self, index):
+        return self._store[self._order[index]]
+
+    def __iter__(self):
+        store = self._store
+        for position in self._order:
+            yield store[position]
+
+
+class ScheduleCollector:
+    """Ranks scored schedule groups as the search streams them in.
+
+    With a `limit` only the best `limit` groups are kept, in a bounded heap
+    whose root is the current worst; otherwise every group is kept, in a
+    compact `ResultStore`. Ties on score keep the order the search found them
+    in. One thread may `consume` a search while another reads `ranked()`.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.found = 0
+        self.done = False
+        self.cancelled = False
+        # Heap entries are (-score, -arrival, group) so the root is the worst kept
+        self._entries = [] if limit is not None else None
+        self._store = ResultStore() if limit is None else None
+        self._ranked = None
+        self._cond = threading.Condition()
+
+    def add(self, score, group):
+        with self._cond:
+            self.found += 1
+            if self.limit is None:
+                self._store.append(score, group)
+            else:
+                entry = (-score, -self.found, group)
+                if len(self._entries) < self.limit:
+                    heapq.heappush(self._entries, entry)
+                elif entry > self._entries[0]:
+                    heapq.heapreplace(self._entries, entry)
+                else:
+                    return
+            self._ranked = None
+            if self.found == 1:
+                self._cond.notify_all()
+
+    def consume(self, scored):
+        """Adds every (score, group) pair from `scored`, then marks the search done."""
+        try:
+            for score, group in scored:
+                if self.cancelled:
+                    break
+                self.add(score, group)
+        finally:
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+
+    def cancel(self):
+        """Asks a running `consume` to stop after the schedule it is adding."""
+        self.cancelled = True
+
+    def wait_for_first(self):
+        """Blocks until at least one schedule is known or the search has finished."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.found or self.done)
+
+    def ranked(self):
+        """The groups kept so far as a sequence of (score, group) pairs, best first."""
+        with self._cond:
+            if self._ranked is None:
+                if self._store is not None:
+                    self._ranked = RankedResults(self._store, rank_order(self._store.scores))
+                else:
+                    self._ranked = [(-neg_score, group) for neg_score, _, group in sorted(self._entries, reverse=True)]
+            return self._ranked
+
+
+class ExpandedSchedules:
+    """Concrete schedules over a ranked list of (score, group) pairs.
+
+    Behaves as a read-only sequence of (score, sections) with one entry per
+    concrete CRN combination; a schedule is only assembled when it is indexed.
+    """
+
+    def __init__(self, ranked, limit=None):
+        self._ranked = ranked
+        self._ends = array("Q", accumulate(group_size(group) for _, group in ranked))
+        self._len = self._ends[-1] if self._ends else 0
+        if limit is not None:
+            self._len = min(self._len, limit)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._len:
+            raise IndexError(index)
+        g = bisect_right(self._ends, index)
+        first = self._ends[g - 1] if g else 0
+        score, group = self._ranked[g]
+        return score, expand_group(group, index - first)
+
+
+# --- Incremental Re-solve ---
+
+
+def filter_scored(ranked, allowed):
+    """Narrows ranked (score, group) pairs to the sections `allowed` accepts.
+
+    Groups left without a usable section for some course are dropped; scores
+    are unchanged because every surviving member meets at the same times.
+    """
+    for score, group in ranked:
+        narrowed = tuple(tuple(s for s in members if allowed(s)) for members in group)
+        if all(narrowed):
+            yield score, narrowed
+
+
+def iter_added_groups(kept_buckets, added_buckets, courses, model=CAMPUS_TIME):
+    """Groups for every schedule that uses at least one section of `added_buckets`.
+
+    Schedules are split by the first course (in `courses` order) that uses an
+    added section: earlier courses draw only from `kept_buckets` and later ones
+    from both, so each schedule is found exactly once and only the newly
+    allowed part of the space is searched.
+    """
+    for p, course in enumerate(courses):
+        if not added_buckets[course]:
+            continue
+        buckets = {}
+        for q, other in enumerate(courses):
+            if q < p:
+                buckets[other] = kept_buckets[other]
+            elif q == p:
+                buckets[other] = added_buckets[other]
+            else:
+                buckets[other] = kept_buckets[other] + added_buckets[other]
+        yield from SearchSpace(buckets, courses, model=model).iter_groups()
+
+
+def extend_scored(ranked, sections, model=CAMPUS_TIME):
+    """Adds one more course to ranked (score, group) pairs.
+
+    Each group is paired with every class of `sections` that fits around it;
+    the new course's classes are appended at the end of each group.
+    """
+    classes = [
+        members
+        for members in group_equivalent_sections(sections, model.uses_locations)
+        if not has_conflict(members[:1])
+    ]
+    for _, group in ranked:
+        reps = [members[0] for members in group]
+        occupied = 0
+        for section in reps:
+            occupied |= section.mask
+        for members in classes:
+            if not occupied & members[0].mask:
+                yield model.evaluate(reps + [members[0]]), group + (members,)
+
+
+def in_search_order(scored, space):
+    """Orders (score, group) pairs the way a fresh search of `space` yields them.
+
+    Re-solved results come from several sources, so ties on score would
+    otherwise be ranked by where each group came from. A group may also hold
+    only the previously or only the newly allowed part of one of the space's
+    classes; those parts are merged back into the whole class.
+    """
+    lookup = [{id(s): a for a, members in enumerate(classes) for s in members} for classes in space.classes]
+    found = {}
+    for score, group in scored:
+        found[tuple(lookup[depth][id(group[pos][0])] for depth, pos in enumerate(space.order))] = score
+    for chosen in sorted(found):
+        yield found[chosen], space.group(chosen)
+
+
+# --- Parallel Search ---
+
+# Set in each worker process by `_init_worker`, so the space is only pickled once per worker
+_worker_space = None
+_worker_stopped = None
+# Schedules a worker finds between checks for a stopped search
+STOP_CHECK_INTERVAL = 4096
+
+
+def _init_worker(space, stopped):
+    global _worker_space, _worker_stopped
+    _worker_space = space
+    _worker_stopped = stopped
+    if space.stats is not None:
+        # Counters are sent back per subtree, starting from zero in each worker
+        space.stats = Counter()
+
+
+def _search_subtree(prefix, limit):
+    """Scored schedules under `prefix`, in search order (only the best `limit` when given), and the search counters.
+
+    The counters include "schedules found" for the schedules trimmed by
+    `limit`, which the parent never sees.
+    """
+    space = _worker_space
+    evaluate = space.model.evaluate
+    if limit is None:
+        results = [(evaluate(space.sections(chosen)), chosen) for chosen in _subtree_indices(space, prefix)]
+    else:
+        collector = ScheduleCollector(limit)
+        counting = space.stats is not None
+        found = 0
+        for chosen in _subtree_indices(space, prefix):
+            collector.add(evaluate(space.sections(chosen)), chosen)
+            if counting:
+                found += group_size(space.group(chosen))
+        # Class indices increase along the search, so sorting them restores search order
+        results = sorted(collector.ranked(), key=lambda scored: scored[1])
+        if counting:
+            space.stats["schedules found"] += found - sum(group_size(space.group(chosen)) for _, chosen in results)
+    stats = space.stats
+    if stats is not None:
+        space.stats = Counter()
+    return results, stats
+
+
+def _subtree_indices(space, prefix):
+    """`space.iter_indices(prefix)`, cut short once the parent has stopped the search."""
+    for count, chosen in enumerate(space.iter_indices(prefix)):
+        if not count % STOP_CHECK_INTERVAL and _worker_stopped.is_set():
+            return
+        yield chosen
+
+
+def split_prefixes(space, pieces):
+    """Feasible partial schedules, from the shallowest depth that gives at least `pieces` of them.
+
+    Only the pass that is kept adds to `space.stats`, so the counters match a serial search.
+    """
+    stats = space.stats
+    prefixes, kept = [()], None
+    try:
+        for depth in range(1, len(space.domains)):
+            space.stats = kept = None if stats is None else Counter()
+            prefixes = list(space.iter_indices(stop=depth))
+            if len(prefixes) >= pieces:
+                break
+    finally:
+        space.stats = stats
+    if kept:
+        stats.update(kept)
+    return prefixes
+
+
+class ParallelSearch:
+    """Iterates (score, group) pairs like `score_groups(space.iter_groups())`, using a process pool.
+
+    The search is split into subtrees by partial-schedule prefix; each worker
+    does its own conflict filtering and scoring (keeping only its best `limit`
+    when given). Subtree results are merged back in search order, so the
+    ranking is identical to a serial run. `stop` ends the search from any
+    thread: queued subtrees are cancelled and running ones cut short.
+    """
+
+    def __init__(self, space, workers, limit=None):
+        self.space = space
+        self.workers = workers
+        self.limit = limit
+        self.stopped = False
+        self._pool = None
+        self._stop_event = None
+
+    def __iter__(self):
+        if self.stopped:
+            return
+        space = self.space
+        prefixes = split_prefixes(space, self.workers * 4)
+        context = multiprocessing.get_context()
+        self._stop_event = context.Event()
+        pool = self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(space, self._stop_event),
+        )
+        try:
+            for results, stats in pool.map(_search_subtree, prefixes, repeat(self.limit)):
+                # Subtrees cut short by `stop` are incomplete
+                if self.stopped:
+                    return
+                if stats:
+                    space.stats.update(stats)
+                for score, chosen in results:
+                    yield score, space.group(chosen)
+        except CancelledError:
+            if not self.stopped:
+                raise
+        finally:
+            # Cuts short any subtree still running if the consumer stopped reading early
+            self._stop_event.set()
+            pool.shutdown(cancel_futures=True)
+
+    def stop(self):
+        self.stopped = True
+        if self._pool is not None:
+            # shutdown() only cancels subtrees no worker has started; the event cuts the running ones short
+            self._stop_event.set()
+            self._pool.shutdown(wait=False, cancel_futures=True)
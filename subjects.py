@@ -18,7 +18,7 @@ def extract_subjects_from_html(html_content: str, term: str = "default") -> List
     return [(code, name.split(" - ", maxsplit=1)[1]) for name, code in matches]
 
 
-def get_subjects_from_web(term: str = "default") -> List[Tuple[str, str]]:
+def get_subjects_from_web(term: str = "default", pooled_session=None) -> List[Tuple[str, str]]:
     import requests
 
     HOST = "selfservice.banner.vt.edu"
@@ -28,6 +28,10 @@ def get_subjects_from_web(term: str = "default") -> List[Tuple[str, str]]:
         "Accept": "text/html",
     }
 
+    if pooled_session is not None:
+        # An `http_session.PooledSession` already knows the server and headers
+        return extract_subjects_from_html(pooled_session.get(RESOURCE).text, term=term)
+
     with requests.Session() as session:
         session.headers.update(DEFAULT_HEADERS)
         response = session.get(URL, timeout=10)